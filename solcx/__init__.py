@@ -4,10 +4,14 @@ from solcx.install import (
     get_executable,
     get_installable_solc_versions,
     get_installed_solc_versions,
+    get_release_list,
     get_solcx_install_folder,
     import_installed_solc,
+    import_solc_archive,
     install_solc,
     install_solc_pragma,
+    set_mirror,
+    set_offline,
     set_target_os,
     set_solc_version,
     set_solc_version_pragma,
@@ -2,6 +2,9 @@
 Install solc
 """
 import argparse
+import bisect
+import hashlib
+import json
 import logging
 import os
 import re
@@ -11,12 +14,15 @@ import subprocess
 import sys
 import tarfile
 import tempfile
+import threading
+import time
 import warnings
 import zipfile
 from base64 import b64encode
-from io import BytesIO
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
 import requests
 from semantic_version import SimpleSpec, Version
@@ -46,9 +52,26 @@ MINIMAL_SOLC_VERSION = Version("0.4.11")
 LOGGER = logging.getLogger("solcx")
 
 SOLCX_BINARY_PATH_VARIABLE = "SOLCX_BINARY_PATH"
+SOLCX_OFFLINE_VARIABLE = "SOLCX_OFFLINE"
+SOLCX_LIST_TTL_VARIABLE = "SOLCX_LIST_TTL"
+SOLCX_MIRROR_VARIABLE = "SOLCX_MIRROR"
+
+# the release list (list.json) is cached in the install folder, and
+# revalidated via its ETag once it is older than the TTL
+RELEASE_LIST = "list.json"
+RELEASE_LIST_ETAG = "list.json.etag"
+RELEASE_LIST_TTL = 24 * 3600
+REQUEST_TIMEOUT = 10
+DOWNLOAD_CHUNK = 1 << 20
 
 _default_solc_binary = None
 _target_os = None
+_offline = None
+_mirror = None
+_release_lists: Dict = {}
+_release_list_lock = threading.Lock()
+_installed_versions: Dict = {}
+_version_indexes: Dict = {}
 
 
 def set_target_os(platform: Optional[str] = None):
@@ -62,6 +85,57 @@ def set_target_os(platform: Optional[str] = None):
         raise OSError(f"Unsupported target OS: '{platform}' - py-solc-x supports 'linux', 'macosx', or 'windows'.")
 
 
+def set_offline(offline: Optional[bool] = True) -> None:
+    """
+    Use only the cached release list and the installed binaries, without network.
+    If unset, the environment variable `SOLCX_OFFLINE` decides.
+    """
+    global _offline
+    _offline = offline
+
+
+def _is_offline() -> bool:
+    if _offline is not None:
+        return _offline
+    return os.getenv(SOLCX_OFFLINE_VARIABLE, "") not in ("", "0", "false", "no")
+
+
+def set_mirror(mirror: Optional[str] = None) -> None:
+    """
+    Fetch the release list and the binaries from a mirror of solc-bin.ethereum.org,
+    given as local directory, `file://` URL or base URL, with the same layout
+    (`<os>-amd64/list.json` etc.). If unset, the environment variable
+    `SOLCX_MIRROR` decides.
+    """
+    global _mirror
+    _mirror = mirror
+    _release_lists.clear()
+
+
+def _binary_url(filename: str) -> str:
+    mirror = _mirror or os.getenv(SOLCX_MIRROR_VARIABLE)
+    if not mirror:
+        return BINARY_DOWNLOAD_BASE.format(_get_target_os(), filename)
+    if "://" not in mirror:
+        mirror = Path(mirror).resolve().as_uri()
+    return f"{mirror.rstrip('/')}/{_get_target_os()}-amd64/{filename}"
+
+
+def _local_path(url: str) -> Optional[Path]:
+    # the path of a file:// URL, None for other URLs
+    parsed = urlparse(url)
+    if parsed.scheme != "file":
+        return None
+    return Path(url2pathname(parsed.path))
+
+
+def _get_release_list_ttl() -> float:
+    try:
+        return float(os.environ[SOLCX_LIST_TTL_VARIABLE])
+    except (KeyError, ValueError):
+        return RELEASE_LIST_TTL
+
+
 def _get_target_os() -> str:
     return _target_os if _target_os else _get_os_name()
 
@@ -87,6 +161,7 @@ def _convert_and_validate_version(version: Union[str, Version]) -> Version:
 
 
 def _unlink_solc(solc_path: Path) -> None:
+    _installed_versions.clear()
     solc_path.unlink()
     if _get_target_os() == "windows":
         shutil.rmtree(solc_path.parent)
@@ -242,19 +317,83 @@ def set_solc_version(
         LOGGER.info(f"Using solc version {version}")
 
 
-def _select_pragma_version(pragma_string: str, version_list: List[Version]) -> Optional[Version]:
-    pragma_string = re.sub(r"(\D)0+(\d)", r"\1\2", pragma_string)
-    comparator_set_range = pragma_string.replace(" ", "").split("||")
-    comparator_regex = re.compile(r"(([<>]?=?|\^)\d+\.\d+\.\d+)")
-    version = None
+COMPARATOR_REGEX = re.compile(r"([<>]?=?|\^)(\d+\.\d+\.\d+)")
 
-    for comparator_set in comparator_set_range:
-        spec = SimpleSpec(",".join((i[0] for i in comparator_regex.findall(comparator_set))))
-        selected = spec.select(version_list)
-        if selected and (not version or version < selected):
-            version = selected
 
-    return version
+def _caret_bound(version: Version) -> Version:
+    # exclusive upper bound of ^version, as in SimpleSpec
+    if version.major:
+        return Version(major=version.major + 1, minor=0, patch=0)
+    if version.minor:
+        return Version(major=0, minor=version.minor + 1, patch=0)
+    return Version(major=0, minor=0, patch=version.patch + 1)
+
+
+class _VersionIndex:
+    """
+    Versions in ascending order, such that the newest version within a range
+    is found by bisection. Selections are memoised per normalised pragma.
+    """
+
+    def __init__(self, version_list: List[Version]) -> None:
+        self.versions = sorted(set(version_list))
+        self.selected: Dict[str, Optional[Version]] = {}
+
+    def newest(self, comparator_set: str) -> Optional[Version]:
+        comparators = COMPARATOR_REGEX.findall(comparator_set)
+        if not comparators:
+            # like SimpleSpec("")
+            raise ValueError("Invalid simple block ''")
+        # bounds as (version, inclusive); the first version is >= 0.0.0
+        lower: Tuple[Version, bool] = (Version("0.0.0"), True)
+        upper: Optional[Tuple[Version, bool]] = None
+        for op, v in comparators:
+            v = Version(v)
+            bounds = {
+                "": ((v, True), (v, True)),
+                "=": ((v, True), (v, True)),
+                ">=": ((v, True), None),
+                ">": ((v, False), None),
+                "<=": (None, (v, True)),
+                "<": (None, (v, False)),
+                "^": ((v, True), (_caret_bound(v), False)),
+            }[op]
+            if bounds[0] and (bounds[0][0], not bounds[0][1]) > (lower[0], not lower[1]):
+                lower = bounds[0]
+            if bounds[1] and (upper is None or (bounds[1][0], bounds[1][1]) < upper):
+                upper = bounds[1]
+
+        start = (bisect.bisect_left if lower[1] else bisect.bisect_right)(self.versions, lower[0])
+        end = len(self.versions)
+        if upper is not None:
+            end = (bisect.bisect_right if upper[1] else bisect.bisect_left)(self.versions, upper[0])
+        return self.versions[end - 1] if end > start else None
+
+    def select(self, pragma_string: str) -> Optional[Version]:
+        if pragma_string not in self.selected:
+            version = None
+            for comparator_set in pragma_string.split("||"):
+                selected = self.newest(comparator_set)
+                if selected and (not version or version < selected):
+                    version = selected
+            self.selected[pragma_string] = version
+        return self.selected[pragma_string]
+
+
+def _get_version_index(version_list: List[Version]) -> _VersionIndex:
+    # indexes are kept per list object, which is referenced to keep its id valid
+    entry = _version_indexes.get(id(version_list))
+    if entry is None or entry[0] is not version_list or entry[1] != len(version_list):
+        if len(_version_indexes) >= 16:
+            _version_indexes.clear()
+        entry = (version_list, len(version_list), _VersionIndex(version_list))
+        _version_indexes[id(version_list)] = entry
+    return entry[2]
+
+
+def _select_pragma_version(pragma_string: str, version_list: List[Version]) -> Optional[Version]:
+    pragma_string = re.sub(r"(\D)0+(\d)", r"\1\2", pragma_string)
+    return _get_version_index(version_list).select(pragma_string.replace(" ", ""))
 
 
 def set_solc_version_pragma(
@@ -332,6 +471,94 @@ def install_solc_pragma(
     return version
 
 
+def _read_release_list(path: Path) -> Optional[Dict]:
+    try:
+        with open(path, "r", encoding="utf8") as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_release_list(path: Path, release_list: Dict, etag: Optional[str]) -> None:
+    # write to temporary files first, such that readers never see partial files
+    for target, content in ((path, json.dumps(release_list)), (path.with_name(RELEASE_LIST_ETAG), etag or "")):
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(content, encoding="utf8")
+            os.replace(tmp, target)
+        except OSError as exc:
+            LOGGER.warning(f"Cannot cache the release list at {target}: {exc}")
+            tmp.unlink(missing_ok=True)
+            return
+
+
+def get_release_list() -> Dict:
+    """
+    Return the release list (list.json) of the `solc` binaries for the target os.
+
+    The list is cached in the install folder. Within the TTL (environment
+    variable `SOLCX_LIST_TTL`, default one day), the cached list is used
+    as is; afterwards it is revalidated by its ETag. If the server cannot be
+    reached, or in offline mode, the cached list is used regardless of its age.
+
+    Returns
+    -------
+    Dict
+        Contents of list.json, with the key `releases` mapping versions to
+        file names.
+    """
+    # installations in parallel threads share the list
+    with _release_list_lock:
+        target_os = _get_target_os()
+        if target_os in _release_lists:
+            return _release_lists[target_os]
+
+        path = get_solcx_install_folder().joinpath(RELEASE_LIST)
+        url = _binary_url(RELEASE_LIST)
+        local = _local_path(url)
+        cached = _read_release_list(path)
+        # a local mirror is always consulted, it does not need the network
+        if local is None and cached is not None and (
+            _is_offline() or time.time() - path.stat().st_mtime < _get_release_list_ttl()
+        ):
+            _release_lists[target_os] = cached
+            return cached
+        if local is None and _is_offline():
+            raise ConnectionError(f"Offline, and no cached list of solc versions at {path}")
+
+        headers = {}
+        if cached is not None:
+            etag = path.with_name(RELEASE_LIST_ETAG)
+            if etag.exists() and etag.read_text(encoding="utf8"):
+                headers["If-None-Match"] = etag.read_text(encoding="utf8")
+        try:
+            if local is not None:
+                with open(local, "r", encoding="utf8") as fp:
+                    release_list = json.load(fp)
+                _write_release_list(path, release_list, None)
+                _release_lists[target_os] = release_list
+                return release_list
+            data = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            if data.status_code == 304:
+                path.touch()
+                release_list = cached
+            elif data.status_code == 200:
+                release_list = data.json()
+                _write_release_list(path, release_list, data.headers.get("ETag"))
+            else:
+                raise ConnectionError(
+                    f"Status {data.status_code} when getting solc versions from solc-bin.ethereum.org"
+                )
+        except (requests.RequestException, OSError, ValueError) as exc:
+            if cached is None:
+                raise ConnectionError(str(exc)) from exc
+            LOGGER.warning(f"Using the cached list of solc versions, cannot revalidate it: {exc}")
+            release_list = cached
+
+        _release_lists[target_os] = release_list
+        return release_list
+
+
 def get_installable_solc_versions() -> List[Version]:
     """
     Return a list of all `solc` versions that can be installed by py-solc-x.
@@ -341,12 +568,7 @@ def get_installable_solc_versions() -> List[Version]:
     List
         List of Versions objects of installable `solc` versions.
     """
-    data = requests.get(BINARY_DOWNLOAD_BASE.format(_get_os_name(), "list.json"))
-    if data.status_code != 200:
-        raise ConnectionError(
-            f"Status {data.status_code} when getting solc versions from solc-bin.ethereum.org"
-        )
-    version_list = sorted((Version(i) for i in data.json()["releases"]), reverse=True)
+    version_list = sorted((Version(i) for i in get_release_list()["releases"]), reverse=True)
     version_list = [i for i in version_list if i >= MINIMAL_SOLC_VERSION]
     return version_list
 
@@ -416,10 +638,17 @@ def get_installed_solc_versions(solcx_binary_path: Union[Path, str] = None) -> L
     Returns
     -------
     List
-        List of Version objects of installed `solc` versions.
+        List of Version objects of installed `solc` versions. The list is
+        shared by subsequent calls, as long as the folder does not change.
     """
     install_path = get_solcx_install_folder(solcx_binary_path)
-    return sorted([Version(i.name[6:]) for i in install_path.glob("solc-v*")], reverse=True)
+    mtime = install_path.stat().st_mtime_ns
+    cached = _installed_versions.get(install_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    versions = sorted([Version(i.name[6:]) for i in install_path.glob("solc-v*")], reverse=True)
+    _installed_versions[install_path] = (mtime, versions)
+    return versions
 
 
 def install_solc(
@@ -461,13 +690,10 @@ def install_solc(
             LOGGER.info(f"solc {version} already installed at: {path}")
             return version
 
-        data = requests.get(BINARY_DOWNLOAD_BASE.format(target_os, "list.json"))
-        if data.status_code != 200:
-            raise ConnectionError(
-                f"Status {data.status_code} when getting solc versions from solc-bin.ethereum.org"
-            )
+        if _is_offline() and _local_path(_binary_url("")) is None:
+            raise SolcNotInstalled(f"solc {version} is not installed, and cannot be downloaded offline")
         try:
-            filename = data.json()["releases"][str(version)]
+            filename = get_release_list()["releases"][str(version)]
         except KeyError:
             raise SolcInstallationError(f"Solc binary for v{version} is not available for this OS")
 
@@ -534,8 +760,9 @@ def compile_solc(
         download = SOURCE_DOWNLOAD_BASE.format(version, f"solidity_{version}.tar.gz")
         install_path = get_solcx_install_folder(solcx_binary_path).joinpath(f"solc-v{version}")
 
-        content = _download_solc(download, show_progress)
-        with tarfile.open(fileobj=BytesIO(content)) as tar:
+        archive = temp_path.joinpath(f"solidity_{version}.tar.gz")
+        _download_solc(download, show_progress, archive)
+        with tarfile.open(archive) as tar:
             tar.extractall(temp_path)
         temp_path = temp_path.joinpath(f"solidity_{version}")
 
@@ -592,64 +819,198 @@ def _get_temp_folder() -> Path:
     return path
 
 
-def _download_solc(url: str, show_progress: bool) -> bytes:
-    LOGGER.info(f"Downloading from {url}")
-    response = requests.get(url, stream=show_progress)
+def _open_download(url: str, offset: int):
+    # return the chunks of the file at url from offset on, the total size,
+    # and whether the download starts at offset indeed
+    local = _local_path(url)
+    if local is not None:
+        try:
+            fp = open(local, "rb")
+        except OSError as exc:
+            raise DownloadError(f"Cannot read {local}: {exc}") from exc
+        fp.seek(offset)
+
+        def chunks():
+            with fp:
+                yield from iter(lambda: fp.read(DOWNLOAD_CHUNK), b"")
+
+        return chunks(), local.stat().st_size, True
+
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    response = requests.get(url, stream=True, headers=headers, timeout=REQUEST_TIMEOUT)
+    if offset and response.status_code == 416:
+        # the partial download is complete already
+        return iter(()), offset, True
     if response.status_code == 404:
         raise DownloadError(
             "404 error when attempting to download from {} - are you sure this"
             " version of solidity is available?".format(url)
         )
-    if response.status_code != 200:
+    if response.status_code not in (200, 206):
         raise DownloadError(
             f"Received status code {response.status_code} when attempting to download from {url}"
         )
-    if not show_progress:
-        return response.content
+    resumed = response.status_code == 206
+    size = int(response.headers.get("content-length", 0)) + (offset if resumed else 0)
+    return response.iter_content(DOWNLOAD_CHUNK), size, resumed
 
-    total_size = int(response.headers.get("content-length", 0))
-    progress_bar = tqdm(total=total_size, unit="iB", unit_scale=True)
-    content = bytes()
 
-    for data in response.iter_content(1024, decode_unicode=True):
-        progress_bar.update(len(data))
-        content += data
-    progress_bar.close()
+def _download_solc(url: str, show_progress: bool, path: Path, sha256: Optional[str] = None) -> None:
+    """
+    Stream the file at url to path, verifying its sha256 checksum if given.
 
-    return content
+    The data is collected in a hidden partial file next to path, such that an
+    interrupted download is resumed by the next attempt.
+    """
+    LOGGER.info(f"Downloading from {url}")
+    part = path.with_name(f".{path.name}.part")
+    checksum = hashlib.sha256()
+    offset = part.stat().st_size if part.exists() else 0
+    chunks, size, resumed = _open_download(url, offset)
+    if resumed and offset:
+        with open(part, "rb") as fp:
+            for data in iter(lambda: fp.read(DOWNLOAD_CHUNK), b""):
+                checksum.update(data)
+    else:
+        offset = 0
+
+    progress_bar = None
+    if show_progress and tqdm is not None:
+        progress_bar = tqdm(total=size, initial=offset, unit="iB", unit_scale=True)
+    try:
+        with open(part, "ab" if offset else "wb") as fp:
+            for data in chunks:
+                fp.write(data)
+                checksum.update(data)
+                if progress_bar is not None:
+                    progress_bar.update(len(data))
+    finally:
+        if progress_bar is not None:
+            progress_bar.close()
+
+    if sha256 and checksum.hexdigest() != sha256:
+        part.unlink()
+        raise DownloadError(f"Checksum mismatch for {url}, expected sha256 {sha256}")
+    os.replace(part, path)
+    _installed_versions.clear()
+
+
+def _expected_sha256(filename: str) -> Optional[str]:
+    # the checksum of the binary listed in list.json, if any
+    for build in get_release_list().get("builds", []):
+        if build.get("path") == filename and build.get("sha256"):
+            return build["sha256"].lower().replace("0x", "", 1)
+    return None
 
 
 def _install_solc_unix(
     version: Version, filename: str, show_progress: bool, solcx_binary_path: Union[Path, str, None]
 ) -> None:
-    download = BINARY_DOWNLOAD_BASE.format(_get_target_os(), filename)
+    download = _binary_url(filename)
     install_path = get_solcx_install_folder(solcx_binary_path).joinpath(f"solc-v{version}")
 
-    content = _download_solc(download, show_progress)
-    with open(install_path, "wb") as fp:
-        fp.write(content)
-
+    _download_solc(download, show_progress, install_path, _expected_sha256(filename))
     install_path.chmod(install_path.stat().st_mode | stat.S_IEXEC)
 
 
 def _install_solc_windows(
     version: Version, filename: str, show_progress: bool, solcx_binary_path: Union[Path, str, None]
 ) -> None:
-    download = BINARY_DOWNLOAD_BASE.format(_get_target_os(), filename)
+    download = _binary_url(filename)
     install_path = get_solcx_install_folder(solcx_binary_path).joinpath(f"solc-v{version}")
 
     temp_path = _get_temp_folder()
-    content = _download_solc(download, show_progress)
+    archive = temp_path.joinpath(Path(filename).name)
+    _download_solc(download, show_progress, archive, _expected_sha256(filename))
 
     if Path(filename).suffix == ".exe":
         install_path.mkdir()
-        with open(install_path.joinpath("solc.exe"), "wb") as fp:
-            fp.write(content)
+        shutil.move(str(archive), str(install_path.joinpath("solc.exe")))
+        shutil.rmtree(str(temp_path))
 
     else:
-        with zipfile.ZipFile(BytesIO(content)) as zf:
-            zf.extractall(str(temp_path))
-            temp_path.rename(install_path)
+        extract_path = temp_path.joinpath("extract")
+        with zipfile.ZipFile(archive) as zf:
+            zf.extractall(str(extract_path))
+        extract_path.rename(install_path)
+        shutil.rmtree(str(temp_path))
+
+
+def import_solc_archive(
+    archive: Union[Path, str], solcx_binary_path: Union[Path, str] = None
+) -> List[Version]:
+    """
+    Install the `solc` binaries contained in a tar archive.
+
+    The archive may hold the contents of an install folder (files named
+    `solc-v<version>`) or of a mirror of solc-bin (binaries named as in its
+    `list.json`, which has to be part of the archive). Binaries listed in a
+    `list.json` are verified against its checksums, and the list seeds the
+    cached release list. Versions already installed are skipped. Binaries
+    failing verification are reported together, after installing the others.
+
+    Arguments
+    ---------
+    archive : Path | str
+        Path of the tar archive, possibly compressed.
+    solcx_binary_path : Path | str, optional
+        User-defined path, used to override the default installation directory.
+
+    Returns
+    -------
+    List
+        Versions installed from the archive.
+    """
+    install_folder = get_solcx_install_folder(solcx_binary_path)
+    installed, failures = [], []
+    with tarfile.open(archive) as tar:
+        members = [m for m in tar.getmembers() if m.isfile()]
+        release_list = None
+        for member in members:
+            if Path(member.name).name == RELEASE_LIST:
+                release_list = json.load(tar.extractfile(member))
+                _write_release_list(install_folder.joinpath(RELEASE_LIST), release_list, None)
+                _release_lists.pop(_get_target_os(), None)
+        filenames = {}
+        checksums = {}
+        if release_list:
+            filenames = {Path(f).name: v for v, f in release_list.get("releases", {}).items()}
+            checksums = {
+                Path(b["path"]).name: b["sha256"].lower().replace("0x", "", 1)
+                for b in release_list.get("builds", [])
+                if b.get("path") and b.get("sha256")
+            }
+
+        for member in members:
+            name = Path(member.name).name
+            match = re.fullmatch(r"solc-v(\d+\.\d+\.\d+)", name)
+            version = match[1] if match else filenames.get(name)
+            if version is None:
+                continue
+            version = Version(version)
+            if _get_target_os() == "windows" or _check_for_installed_version(version, solcx_binary_path):
+                continue
+            with get_process_lock(str(version)):
+                install_path = install_folder.joinpath(f"solc-v{version}")
+                part = install_path.with_name(f".{install_path.name}.part")
+                checksum = hashlib.sha256()
+                with tar.extractfile(member) as src, open(part, "wb") as fp:
+                    for data in iter(lambda: src.read(DOWNLOAD_CHUNK), b""):
+                        fp.write(data)
+                        checksum.update(data)
+                if name in checksums and checksum.hexdigest() != checksums[name]:
+                    part.unlink()
+                    failures.append(f"Checksum mismatch for {member.name}")
+                    continue
+                part.chmod(part.stat().st_mode | stat.S_IEXEC)
+                os.replace(part, install_path)
+                _installed_versions.clear()
+            installed.append(version)
+    if failures:
+        raise SolcInstallationError(
+            f"{len(installed)} version(s) installed, but\n" + "\n".join(failures)
+        )
+    return sorted(installed, reverse=True)
 
 
 def _validate_installation(version: Version, solcx_binary_path: Union[Path, str, None]) -> None:
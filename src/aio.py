@@ -0,0 +1,170 @@
+import asyncio
+import concurrent.futures
+import multiprocessing
+import time
+import src.analysis
+import src.colors
+import src.docker
+import src.logging
+import src.resources
+from src.exceptions import SolScanError
+
+
+async def execute(batch, admission, released, release_slot):
+    """Coroutine version of src.analysis.execute_batch.
+
+    Waiting for resources and containers happens on the event loop, and
+    file operations in threads. The slot of the tool and the admitted
+    resources are released as soon as the container has finished. Returns
+    the tasks whose output remains to be parsed.
+    """
+    loop = asyncio.get_event_loop()
+    prepared, tasks = [], []
+    for task in batch:
+        if await loop.run_in_executor(None, src.analysis.prepare, task):
+            prepared.append(task)
+            if not await loop.run_in_executor(None, src.analysis.from_cache, task):
+                tasks.append(task)
+
+    # perform analysis, as soon as the quotas of the task fit
+    if tasks:
+        cpus, memory = src.resources.demand(tasks[0])
+        while not admission.try_acquire(cpus, memory):
+            released.clear()
+            await released.wait()
+        try:
+            start_time = time.time()
+            with admission.tmpfs(tasks):
+                exit_code, tool_log, tool_output, docker_args, resources = await src.analysis.backend(tasks[0]).execute_batch_async(tasks)
+            duration = time.time() - start_time
+        finally:
+            admission.release(cpus, memory)
+            release_slot()
+
+        await loop.run_in_executor(None, src.analysis.finish,
+            tasks, start_time, duration, exit_code, tool_log, tool_output, docker_args, resources)
+
+    return [task for task in prepared if task.settings.json or task.settings.sarif]
+
+
+async def parse(task, parsers, parsing, logqueue):
+    """Parse the output of the task in the process pool 'parsers', with at
+    most as many jobs submitted as allowed by the semaphore 'parsing'."""
+    loop = asyncio.get_event_loop()
+    async with parsing:
+        try:
+            await loop.run_in_executor(parsers, src.analysis.postprocess,
+                task.rdir, task.settings.sarif, src.analysis.journal)
+        except SolScanError as e:
+            src.logging.message(src.colors.error(f"Parsing the results in {task.rdir} failed.\n{e}"), "", logqueue)
+
+
+def pick(items, slots):
+    """Take the next item (from the end) whose tool has a free slot."""
+    for i in range(len(items) - 1, -1, -1):
+        if slots.try_acquire(src.analysis.item_toolid(items[i])):
+            return items.pop(i)
+    return None
+
+
+def produce(source, items, exhausted, loop, released):
+    """Insert the items generated by source at the front of items (runs in a thread)."""
+    def add(item):
+        items.insert(0, item)
+        released.set()
+    def finish():
+        exhausted.set()
+        released.set()
+    try:
+        for item in source:
+            loop.call_soon_threadsafe(add, item)
+    finally:
+        loop.call_soon_threadsafe(finish)
+
+
+async def analyser(items, exhausted, tasks_total, counters, admission, slots, released, parsers, parsing, parse_jobs, logqueue):
+    while items or not exhausted.is_set():
+        item = pick(items, slots)
+        if item is None:
+            released.clear()
+            await released.wait()
+            continue
+        batch = item if isinstance(item, list) else [item]
+        task, n = batch[0], len(batch)
+        counters["started"] += n
+        files = src.colors.file(f"{task.relfn}:{task.contract}" if task.contract else task.relfn) if n == 1 else f"{n} files"
+        src.logging.message(
+            f"{counters['started']}/{tasks_total.value}: {src.colors.tool(task.tool.id)} and {files}",
+            "", logqueue)
+
+        holding = True
+        def release_slot():
+            nonlocal holding
+            if holding:
+                holding = False
+                slots.release(task.tool.id)
+                released.set()
+
+        try:
+            for parsed in await execute(batch, admission, released, release_slot):
+                parse_jobs.append(asyncio.ensure_future(parse(parsed, parsers, parsing, logqueue)))
+        except Exception as e:
+            # a failing task must not stop the other tasks on the event loop
+            if not isinstance(e, SolScanError):
+                e = f"{type(e).__name__}: {e}"
+            src.logging.message(src.colors.error(f"Analysis of {task.absfn} with {task.tool.id} failed.\n{e}"), "", logqueue)
+        finally:
+            release_slot()
+        counters["completed"] += n
+
+
+async def analyse(items, tasks_total, settings, admission, slots, logqueue):
+    loop = asyncio.get_event_loop()
+    released = asyncio.Event()
+    exhausted = asyncio.Event()
+    counters = {"started": 0, "completed": 0}
+    producer = None
+    if isinstance(items, list):
+        # items are taken from the end of the list
+        items = list(reversed(items))
+        exhausted.set()
+    else:
+        # items are generated while the analysis is running
+        source, items = items, []
+        producer = loop.run_in_executor(None, produce, source, items, exhausted, loop, released)
+    mp = multiprocessing.get_context("spawn")
+    parsing = asyncio.Semaphore(settings.parsers)
+    parse_jobs = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=settings.parsers, mp_context=mp) as parsers:
+        analysers = [asyncio.ensure_future(analyser(items, exhausted, tasks_total, counters, admission, slots, released, parsers, parsing, parse_jobs, logqueue))
+                     for _ in range(settings.processes)]
+        try:
+            await asyncio.gather(*analysers)
+        except BaseException:
+            # cancel the remaining analysers and parse jobs, such that containers are cleaned up
+            for job in analysers + parse_jobs:
+                job.cancel()
+            await asyncio.gather(*analysers, *parse_jobs, return_exceptions=True)
+            raise
+        # parsing continues after the last container has finished
+        await asyncio.gather(*parse_jobs)
+    if producer:
+        # raises the exceptions of the generator, if any
+        await producer
+
+
+def run(items, tasks_total, settings, admission, slots, logqueue):
+    """Execute the items (tasks or batches) with up to 'processes' concurrent
+    tasks, all driven by an event loop in the current process."""
+    src.logging.quiet = settings.quiet
+    loop = asyncio.new_event_loop()
+    try:
+        # Each task runs at most one blocking call at a time in a thread (a
+        # local task for its whole run), plus one thread producing a stream
+        # of items. The default pool of the loop would depend on the host.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=settings.processes + 1) as threads:
+            loop.set_default_executor(threads)
+            loop.run_until_complete(analyse(items, tasks_total, settings, admission, slots, logqueue))
+    finally:
+        loop.close()
+        src.docker.shutdown()
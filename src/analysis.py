@@ -1,5 +1,5 @@
+import collections
 import multiprocessing
-import random
 import time
 import datetime
 import os
@@ -8,10 +8,18 @@ import platform
 import src.logging
 import src.colors
 import src.docker
+import src.local
 import src.cfg
 import src.io
 import src.parsing
 import src.sarif
+import src.scheduler
+import src.resources
+import src.tools
+import src.tasks
+import src.aio
+import src.journal
+import src.cache
 from src.exceptions import SolScanError
 
 
@@ -40,7 +48,41 @@ SYSTEM_INFO = {
 }
 
 
-def task_log_dict(task, start_time, duration, exit_code, log, output, docker_args):
+# admission control, queue for the parsers and run journal, set by the analyser
+admission = None
+parsequeue = None
+journal = None
+
+# number of jobs per parser that may be waiting in the parse queue
+PARSE_BACKLOG = 8
+
+
+def record(event, rdirs, jrnl=None):
+    jrnl = jrnl or journal
+    if jrnl:
+        jrnl.write(event, rdirs)
+
+
+# modules executing the tasks, selected by task.backend
+BACKENDS = {
+    "docker": src.docker,
+    "local": src.local,
+}
+
+
+def backend(task):
+    return BACKENDS[task.backend]
+
+
+def reserve(task):
+    return admission.reserve(task) if admission else src.resources.unlimited(task)
+
+
+def reserve_tmpfs(tasks):
+    return admission.tmpfs(tasks) if admission else src.resources.unlimited(tasks)
+
+
+def task_log_dict(task, start_time, duration, exit_code, log, output, docker_args, resources=None):
     task_log = {
         "filename": task.relfn,
         "runid": task.settings.runid,
@@ -52,13 +94,21 @@ def task_log_dict(task, start_time, duration, exit_code, log, output, docker_arg
             "output": src.cfg.TOOL_OUTPUT if output else None},
         "solc": str(task.solc_version) if task.solc_version else None,
         "tool": task.tool.dict(),
-        "docker": docker_args,
+        task.backend: docker_args,
+        "resources": resources,
     }
+    if task.contract:
+        task_log["contract"] = task.contract
     task_log.update(SYSTEM_INFO)
     return task_log
 
 
-def execute(task):
+def prepare(task):
+    """Prepare the result directory of the task.
+
+    Returns False if the task has been completed before and is not to be
+    overwritten, and True if the analysis is to be performed.
+    """
 
     # create result dir if it doesn't exist
     os.makedirs(task.rdir, exist_ok=True)
@@ -73,89 +123,424 @@ def execute(task):
         old_fn = old["filename"]
         old_toolid = old["tool"]["id"]
         old_mode = old["tool"]["mode"]
-        if task.relfn != old_fn or task.tool.id != old_toolid or task.tool.mode != old_mode:
+        old_contract = old.get("contract")
+        if (task.relfn != old_fn or task.tool.id != old_toolid or task.tool.mode != old_mode
+                or task.contract != old_contract):
             raise SolScanError(
                 f"Result directory {task.rdir} occupied by another task"
-                f" ({old_toolid}/{old_mode}, {old_fn})")
-        if not task.settings.overwrite:
-            return 0.0
+                f" ({old_toolid}/{old_mode}, {old_fn}{':' + old_contract if old_contract else ''})")
+        if not task.settings.overwrite and not task.rerun:
+            record(src.journal.DONE, [task.rdir])
+            return False
 
     # remove any leftovers from a previous analysis
-    fn_tool_log = os.path.join(task.rdir, src.cfg.TOOL_LOG)
-    fn_tool_output = os.path.join(task.rdir, src.cfg.TOOL_OUTPUT)
-    fn_parser_output = os.path.join(task.rdir, src.cfg.PARSER_OUTPUT)
-    fn_sarif_output = os.path.join(task.rdir, src.cfg.SARIF_OUTPUT)
-    for fn in (fn_task_log, fn_tool_log, fn_tool_output, fn_parser_output, fn_sarif_output):
+    for fn in (src.cfg.TASK_LOG, src.cfg.TOOL_LOG, src.cfg.TOOL_OUTPUT, src.cfg.PARSER_OUTPUT, src.cfg.SARIF_OUTPUT):
+        fn = os.path.join(task.rdir, fn)
         try:
             os.remove(fn)
         except:
             pass
         if os.path.exists(fn):
             raise SolScanError(f"Cannot clear old output {fn}")
+    record(src.journal.STARTED, [task.rdir])
+    return True
 
-    # perform analysis
-    start_time = time.time()
-    exit_code, tool_log, tool_output, docker_args = src.docker.execute(task)
-    duration = time.time() - start_time
+
+def store(task, start_time, duration, exit_code, tool_log, tool_output, docker_args, resources=None, batch=None):
+    fn_task_log = os.path.join(task.rdir, src.cfg.TASK_LOG)
+    fn_tool_log = os.path.join(task.rdir, src.cfg.TOOL_LOG)
+    fn_tool_output = os.path.join(task.rdir, src.cfg.TOOL_OUTPUT)
 
     # write result to files
-    task_log = task_log_dict(task, start_time, duration, exit_code, tool_log, tool_output, docker_args)
+    task_log = task_log_dict(task, start_time, duration, exit_code, tool_log, tool_output, docker_args, resources)
+    if batch:
+        task_log["batch"] = batch
+    if task.cache_key:
+        task_log["cache"] = {"key": task.cache_key, "hit": False}
     src.io.write_json(fn_task_log, task_log)
-    if tool_log:
+    # logs streamed to their final location need not be written again
+    if tool_log and getattr(tool_log, "fn", None) != fn_tool_log:
         src.io.write_txt(fn_tool_log, tool_log)
-    if tool_output:
+    if tool_output and getattr(tool_output, "fn", None) != fn_tool_output:
+        if isinstance(tool_output, src.io.BinFile):
+            tool_output = tool_output.read()
         src.io.write_bin(fn_tool_output, tool_output)
+    if task.cache_key:
+        src.cache.store(task.cache_key, task.rdir, task_log)
+
+
+def from_cache(task):
+    """Take the result of the task from the cache, if available.
+
+    Returns True if the tool log and output have been copied from the cache.
+    """
+    if not task.settings.cache:
+        return False
+    task.cache_key = src.cache.key(task)
+    entry = src.cache.lookup(task.cache_key)
+    if not entry:
+        return False
+    src.cache.materialise(task.cache_key, task.rdir)
+    tool_log = os.path.exists(os.path.join(task.rdir, src.cfg.TOOL_LOG))
+    tool_output = os.path.exists(os.path.join(task.rdir, src.cfg.TOOL_OUTPUT))
+    task_log = task_log_dict(task, time.time(), entry["duration"], entry["exit_code"], tool_log, tool_output, entry["docker"])
+    task_log["cache"] = {"key": task.cache_key, "hit": True}
+    src.io.write_json(os.path.join(task.rdir, src.cfg.TASK_LOG), task_log)
+    if not (task.settings.json or task.settings.sarif):
+        record(src.journal.DONE, [task.rdir])
+    return True
 
-    # Parse output of tool
-    if task.settings.json or task.settings.sarif:
-        parsed_result = src.parsing.parse(task_log, tool_log, tool_output)
-        src.io.write_json(fn_parser_output, parsed_result)
 
-        # Format parsed result as sarif
-        if task.settings.sarif:
-            sarif_result = src.sarif.sarify(task_log["tool"], parsed_result["findings"])
-            src.io.write_json(fn_sarif_output, sarif_result)
+def finish(tasks, start_time, duration, exit_code, tool_log, tool_output, docker_args, resources=None):
+    """Store the result of the analysis for each of the tasks."""
+    if len(tasks) == 1:
+        store(tasks[0], start_time, duration, exit_code, tool_log, tool_output, docker_args, resources)
+    else:
+        store_batch(tasks, start_time, duration, exit_code, tool_log, tool_output, docker_args, resources)
 
+    # durations for scheduling later runs, unless history is switched off
+    if tasks[0].settings.history != []:
+        src.scheduler.record(tasks, duration)
+
+    # without parsing, the tasks are done
+    record(src.journal.DONE, [task.rdir for task in tasks if not (task.settings.json or task.settings.sarif)])
+
+
+def store_batch(tasks, start_time, duration, exit_code, tool_log, tool_output, docker_args, resources=None):
+    """Split the result of a batch and store it for each of the tasks.
+
+    The tool's parser module has to provide a function 'split', which
+    distributes log and output of the batch to the individual contracts.
+    Each task is charged an equal share of time, whereas the resources
+    used are those of the whole batch.
+    """
+    tool_parser = src.parsing.get_parser(tasks[0].tool.dict())
+    filenames = [os.path.split(task.absfn)[1] for task in tasks]
+    if isinstance(tool_output, src.io.BinFile):
+        tool_output = tool_output.read()
+    try:
+        parts = tool_parser.split(filenames, tool_log, tool_output)
+    except Exception as e:
+        raise SolScanError(f"Splitting the result of a batch failed\n{e}")
+    batch = {"size": len(tasks), "duration": duration}
+    for task, (task_tool_log, task_tool_output) in zip(tasks, parts):
+        store(task, start_time, duration / len(tasks), exit_code,
+            task_tool_log, task_tool_output, docker_args, resources, batch)
+
+
+def postprocess(rdir, sarif, jrnl=None):
+    """Parse the tool output in rdir, and optionally format it as sarif."""
+    fn_task_log = os.path.join(rdir, src.cfg.TASK_LOG)
+    fn_tool_log = os.path.join(rdir, src.cfg.TOOL_LOG)
+    fn_tool_output = os.path.join(rdir, src.cfg.TOOL_OUTPUT)
+    fn_parser_output = os.path.join(rdir, src.cfg.PARSER_OUTPUT)
+    fn_sarif_output = os.path.join(rdir, src.cfg.SARIF_OUTPUT)
+
+    task_log = src.io.read_json(fn_task_log)
+    tool_log = src.io.read_log(fn_tool_log)
+    tool_output = src.io.read_bin(fn_tool_output) if os.path.exists(fn_tool_output) else None
+
+    parsed_result = src.parsing.parse(task_log, tool_log, tool_output)
+    src.io.write_json(fn_parser_output, parsed_result)
+
+    if sarif:
+        sarif_result = src.sarif.sarify(task_log["tool"], parsed_result["findings"])
+        src.io.write_json(fn_sarif_output, sarif_result)
+
+    record(src.journal.DONE, [rdir], jrnl)
+
+
+def per_contract(tasks, contracts):
+    """Pass on the tasks, collecting the contracts analysed separately per result dir of the file."""
+    for task in tasks:
+        if task.contract:
+            contracts.setdefault(os.path.dirname(task.rdir), []).append(task.contract)
+        yield task
+
+
+def execute(task):
+    return execute_batch([task])
+
+
+def execute_batch(tasks):
+    """Analyse one or several contracts with the same tool in one container."""
+    prepared = [task for task in tasks if prepare(task)]
+    tasks = [task for task in prepared if not from_cache(task)]
+
+    # perform analysis
+    duration = 0.0
+    if tasks:
+        with reserve(tasks[0]), reserve_tmpfs(tasks):
+            start_time = time.time()
+            exit_code, tool_log, tool_output, docker_args, resources = backend(tasks[0]).execute_batch(tasks)
+            duration = time.time() - start_time
+        finish(tasks, start_time, duration, exit_code, tool_log, tool_output, docker_args, resources)
+
+    # Parse output of tool, preferably by a separate parser process
+    for task in prepared:
+        if task.settings.json or task.settings.sarif:
+            if parsequeue:
+                parsequeue.put((task.rdir, task.settings.sarif))
+            else:
+                postprocess(task.rdir, task.settings.sarif)
     return duration
 
 
-def analyser(logqueue, taskqueue, tasks_total, tasks_started, tasks_completed, time_completed):
+def iter_batches(tasks):
+    """Group the tasks of tools with a 'batch' attribute into lists.
+
+    A batch comprises tasks with the same tool and solc version, and
+    contracts with distinct file names, since they share the folder /src.
+    Batches are generated as soon as they are full, and the remaining ones
+    when the tasks are exhausted.
+    """
+    open_batches = {}
+    for task in tasks:
+        if not task.tool.batch or task.tool.batch < 2 or task.contract:
+            yield task
+            continue
+        key = (task.tool.id, task.tool.mode, str(task.solc_version))
+        batch = open_batches.get(key)
+        filename = os.path.split(task.absfn)[1]
+        if batch and filename in {os.path.split(t.absfn)[1] for t in batch}:
+            yield batch
+            batch = None
+        if not batch:
+            batch = []
+            open_batches[key] = batch
+        batch.append(task)
+        if len(batch) >= task.tool.batch:
+            yield batch
+            del open_batches[key]
+    yield from open_batches.values()
+
+
+def batches(tasks):
+    return list(iter_batches(tasks))
+
+
+# seconds between checks whether the analysers are still alive, while waiting for one to become idle
+IDLE_CHECK = 5
+
+
+def item_toolid(item):
+    return (item[0] if isinstance(item, list) else item).tool.id
+
+
+def analyser(logqueue, taskqueue, idle, parse_queue, tasks_total, tasks_started, tasks_completed, time_completed, shared_admission, slots, jrnl, settings, tools):
+    global admission, parsequeue, journal
+    admission = shared_admission
+    parsequeue = parse_queue
+    journal = jrnl
+    src.logging.quiet = settings.quiet
 
     def pre_analysis():
         with tasks_started.get_lock():
-            tasks_started.value += 1
+            tasks_started.value += n
             started = tasks_started.value
+        files = src.colors.file(f"{task.relfn}:{task.contract}" if task.contract else task.relfn) if n == 1 else f"{n} files"
         src.logging.message(
-            f"{started}/{tasks_total}: {src.colors.tool(task.tool.id)} and {src.colors.file(task.relfn)}",
+            f"{started}/{tasks_total.value}: {src.colors.tool(task.tool.id)} and {files}",
             "", logqueue)
 
     def post_analysis(duration):
         with tasks_completed.get_lock(), time_completed.get_lock():
-            tasks_completed.value += 1
+            tasks_completed.value += n
             time_completed.value += duration
             elapsed = time_completed.value
             completed = tasks_completed.value
         # estimated time to completion = avg.time per task * remaining tasks / no.processes
-        etc = elapsed / completed * (tasks_total - completed) / task.settings.processes
+        etc = elapsed / completed * (tasks_total.value - completed) / task.settings.processes
         etc_fmt = datetime.timedelta(seconds=round(etc))
         duration_fmt = datetime.timedelta(seconds=round(duration))
         #src.logging.message(f"{completed}/{tasks_total} completed, ETC {etc_fmt}")
 
+    # The slot of the tool has been acquired by run_processes when queueing
+    # the item. Signal to run_processes that we are ready for the next item.
     while True:
-        task = taskqueue.get()
-        if task is None:
+        idle.release()
+        item = taskqueue.get()
+        if item is None:
+            src.docker.shutdown()
             return
-        src.logging.quiet = task.settings.quiet
+        records = item if isinstance(item, list) else [item]
+        batch = [src.tasks.unpack(record, tools, settings) for record in records]
+        task, n = batch[0], len(batch)
         pre_analysis()
         try:
-            duration = execute(task)
-        except SolScanError as e:
+            duration = execute_batch(batch)
+        except Exception as e:
+            # a failing task must not stop the analyser
             duration = 0
+            if not isinstance(e, SolScanError):
+                e = f"{type(e).__name__}: {e}"
             src.logging.message(src.colors.error(f"Analysis of {task.absfn} with {task.tool.id} failed.\n{e}"), "", logqueue)
+        finally:
+            slots.release(task.tool.id)
         post_analysis(duration)
 
 
-def run(tasks, settings):
+def parser(logqueue, parse_queue, quiet, jrnl):
+    src.logging.quiet = quiet
+    while True:
+        job = parse_queue.get()
+        if job is None:
+            return
+        rdir, sarif = job
+        try:
+            postprocess(rdir, sarif, jrnl)
+        except SolScanError as e:
+            src.logging.message(src.colors.error(f"Parsing the results in {rdir} failed.\n{e}"), "", logqueue)
+
+
+def run_processes(mp, items, tasks_total, settings, tools, shared_admission, slots, logqueue):
+    # start parsers, fed by the analysers via a bounded queue,
+    # such that parsing does not delay the start of the next container;
+    # without json or sarif output, there is nothing to parse
+    n = settings.parsers if settings.json or settings.sarif else 0
+    parse_queue = mp.Queue(max(n, 1) * PARSE_BACKLOG)
+    parsers = [mp.Process(target=parser, args=(logqueue, parse_queue, settings.quiet, journal)) for _ in range(n)]
+    for p in parsers:
+        p.start()
+
+    # accounting
+    taskqueue = mp.Queue()
+    idle = mp.Semaphore(0)
+    tasks_started = mp.Value('L', 0)
+    tasks_completed = mp.Value('L', 0)
+    time_completed = mp.Value('f', 0.0)
+
+    # start analysers, sending them the settings and the tools once
+    tools = list(tools)
+    tool_index = {(tool.id, tool.mode): i for i, tool in enumerate(tools)}
+    shared = (logqueue, taskqueue, idle, parse_queue, tasks_total, tasks_started, tasks_completed, time_completed, shared_admission, slots, journal, settings, tools)
+    analysers = [mp.Process(target=analyser, args=shared) for _ in range(settings.processes)]
+    for a in analysers:
+        a.start()
+
+    def pack(task):
+        return src.tasks.pack(task, tool_index[(task.tool.id, task.tool.mode)])
+
+    # Items are queued one at a time, whenever an analyser is idle. The next
+    # item is the first one, in the order of the items, whose tool has a free
+    # slot. Items passed over for lack of a slot wait per tool, and take
+    # precedence over later items as soon as a slot of their tool is free.
+    source = iter(items)
+    deferred = collections.OrderedDict()  # toolid -> deque of (position, record)
+    position = 0
+
+    def next_item():
+        nonlocal position
+        heads = sorted((waiting[0][0], toolid) for toolid, waiting in deferred.items())
+        for _, toolid in heads:
+            if slots.try_acquire(toolid):
+                waiting = deferred[toolid]
+                record = waiting.popleft()[1]
+                if not waiting:
+                    del deferred[toolid]
+                return record
+        for item in source:
+            toolid = item_toolid(item)
+            record = [pack(task) for task in item] if isinstance(item, list) else pack(item)
+            position += 1
+            if toolid not in deferred and slots.try_acquire(toolid):
+                return record
+            deferred.setdefault(toolid, collections.deque()).append((position, record))
+        return None
+
+    def wait_idle():
+        while not idle.acquire(timeout=IDLE_CHECK):
+            if not any(a.is_alive() for a in analysers):
+                raise SolScanError("All analysers have terminated.")
+
+    try:
+        # feed the analysers with compact records, while the items are generated
+        ready = 0
+        while True:
+            wait_idle()
+            ready += 1
+            while ready:
+                record = next_item()
+                if record is None:
+                    break
+                taskqueue.put(record)
+                ready -= 1
+            if record is None and not deferred:
+                break
+            # otherwise, wait for an analyser to finish and release a slot
+    finally:
+        # wait for analysers to finish
+        for _ in analysers:
+            taskqueue.put(None)
+        for a in analysers:
+            a.join()
+
+        # wait for parsers to finish
+        for _ in parsers:
+            parse_queue.put(None)
+        for p in parsers:
+            p.join()
+
+
+def pending(task, states):
+    """Whether the task still needs to run, according to the journal states."""
+    state = states.get(task.rdir)
+    if state == src.journal.DONE:
+        return False
+    task.rerun = state == src.journal.STARTED
+    return True
+
+
+def remove_orphans(settings):
+    return src.docker.remove_containers(settings.runid)
+
+
+def resume(tasks, settings, logqueue):
+    """Determine the pending tasks from the journal of an interrupted run.
+
+    Completed tasks are dropped without looking at their results, tasks
+    that were interrupted are rerun, and containers left over from the
+    interrupted run are removed.
+    """
+    states = journal.read()
+    tasks_pending = [task for task in tasks if pending(task, states)]
+    reruns = sum(1 for task in tasks_pending if task.rerun)
+    orphans = 0
+    if any(task.backend == "docker" for task in tasks):
+        orphans = remove_orphans(settings)
+    src.logging.message(
+        f"Resuming: {len(tasks)-len(tasks_pending)} tasks done, {reruns} interrupted,"
+        f" {len(tasks_pending)-reruns} not started; {orphans} orphaned container(s) removed",
+        "", logqueue)
+    return tasks_pending
+
+
+def stream(tasks, settings, tasks_total):
+    """Generate the items to execute while the tasks are still being collected.
+
+    Tasks are journaled and counted as they arrive, in the order of their
+    generation, without scheduling the longest ones first.
+    """
+    states = journal.read() if settings.resume else {}
+    def enqueue():
+        for task in tasks:
+            if settings.resume and not pending(task, states):
+                continue
+            record(src.journal.ENQUEUED, [task.rdir])
+            with tasks_total.get_lock():
+                tasks_total.value += 1
+            yield task
+    yield from iter_batches(enqueue())
+
+
+def run(tasks, settings, tools=None):
+    """Analyse the tasks.
+
+    With the setting 'stream', tasks is an iterable generating the tasks
+    during the analysis, and tools has to list the tools involved.
+    """
+    global journal
+
     # spawn processes (instead of forking), for identical behavior on Linux and MacOS
     mp = multiprocessing.get_context("spawn")
 
@@ -165,29 +550,62 @@ def run(tasks, settings):
     try:
         start_time = time.time()
 
-        # fill task queue
-        taskqueue = mp.Queue()
-        random.shuffle(tasks)
-        for task in tasks:
-            taskqueue.put(task)
-        for _ in range(settings.processes):
-            taskqueue.put(None)
+        # record the progress in the journal, and consult it when resuming
+        journal = src.journal.Journal(settings.journal)
+        journal.create(settings.overwrite and not settings.resume)
+        tasks_total = mp.Value('L', 0)
 
-        # accounting
-        tasks_total = len(tasks)
-        tasks_started = mp.Value('L', 0)
-        tasks_completed = mp.Value('L', 0)
-        time_completed = mp.Value('f', 0.0)
+        # result dirs of files analysed contract by contract, to be merged in the end
+        contracts = {}
+        tasks = per_contract(tasks, contracts)
 
-        # start analysers
-        shared = (logqueue, taskqueue, tasks_total, tasks_started, tasks_completed, time_completed)
-        analysers = [mp.Process(target=analyser, args=shared) for _ in range(settings.processes)]
-        for a in analysers:
-            a.start()
+        if settings.stream:
+            local = src.tools.ids(settings.local)
+            if settings.resume and any(tool.id not in local for tool in tools):
+                orphans = remove_orphans(settings)
+                src.logging.message(f"Resuming: {orphans} orphaned container(s) removed", "", logqueue)
+            items = stream(tasks, settings, tasks_total)
+        else:
+            tasks = list(tasks)
+            if settings.resume:
+                tasks = resume(tasks, settings, logqueue)
+            record(src.journal.ENQUEUED, [task.rdir for task in tasks])
+            tasks_total.value = len(tasks)
+            tools = list({(task.tool.id, task.tool.mode): task.tool for task in tasks}.values())
 
-        # wait for analysers to finish
-        for a in analysers:
-            a.join()
+            # fill task queue, longest tasks first
+            items, makespan, known = src.scheduler.schedule(batches(tasks), settings)
+            makespan_fmt = datetime.timedelta(seconds=round(makespan))
+            src.logging.message(
+                f"Predicted duration: {makespan_fmt} ({known}/{len(tasks)} tasks with history)",
+                "", logqueue)
+
+        # admission control: containers are started as long as their quotas fit the host
+        cpus = settings.cpus or src.resources.host_cpus()
+        memory = src.resources.mem_bytes(settings.memory) or src.resources.host_memory()
+        tmpfs = src.resources.mem_bytes(settings.tmpfs)
+        shared_admission = src.resources.Admission(mp, cpus, memory, tmpfs)
+
+        # per-tool limits on parallel tasks
+        slots = src.resources.ToolSlots(mp, src.resources.tool_limits(tools, settings))
+
+        if settings.executor == "asyncio":
+            src.aio.run(items, tasks_total, settings, shared_admission, slots, logqueue)
+        else:
+            run_processes(mp, items, tasks_total, settings, tools, shared_admission, slots, logqueue)
+
+        if settings.json or settings.sarif:
+            for rdir, names in sorted(contracts.items()):
+                try:
+                    src.parsing.merge_contracts(rdir, names, settings.sarif)
+                except SolScanError as e:
+                    src.logging.message(src.colors.error(f"Merging the results in {rdir} failed.\n{e}"), "", logqueue)
+
+        # keep the result cache within its size
+        if settings.cache and settings.cache_size:
+            evicted = src.cache.evict(src.resources.mem_bytes(settings.cache_size))
+            if evicted:
+                src.logging.message(f"{evicted} entries evicted from the result cache", "", logqueue)
 
         # good bye
         duration = datetime.timedelta(seconds=round(time.time() - start_time))
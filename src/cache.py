@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import src.cfg
+import src.docker
+import src.io
+from src.exceptions import SolScanError
+
+CACHE_RESULTS = os.path.join(src.cfg.CACHE_HOME, "results")
+ENTRY = "entry.json"
+
+# exit codes of failed docker invocations, which are not worth caching
+DOCKER_FAILURES = (125, 126, 127)
+
+
+def file_hash(fn):
+    h = hashlib.sha256()
+    with open(fn, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+bin_hashes = {}
+
+
+def bin_hash(tool):
+    """Hash of the names and contents of the files in the bin folder of the tool."""
+    if not tool.bin:
+        return None
+    if tool.absrcin not in bin_hashes:
+        h = hashlib.sha256()
+        for path, dirs, files in os.walk(tool.absrcin):
+            dirs.sort()
+            for fn in sorted(files):
+                absfn = os.path.join(path, fn)
+                h.update(os.path.relpath(absfn, tool.absrcin).encode("utf8"))
+                h.update(file_hash(absfn).encode("utf8"))
+        bin_hashes[tool.absrcin] = h.hexdigest()
+    return bin_hashes[tool.absrcin]
+
+
+def key(task):
+    """Key identifying everything that determines the result of a task."""
+    try:
+        k = {
+            "contract": file_hash(task.absfn),
+            "tool": {f: getattr(task.tool, f) for f in ("id", "mode", "image", "output", "batch")},
+            "command": task.tool.dict()["command"],
+            "entrypoint": task.tool.dict()["entrypoint"],
+            "image": src.docker.image_id(task.tool.image) if task.backend == "docker" else task.backend,
+            "bin": bin_hash(task.tool),
+            "solc": str(task.solc_version) if task.solc_version else None,
+            "contract_name": task.contract,
+            "timeout": task.settings.timeout,
+            "cpu_quota": task.settings.cpu_quota or task.tool.cpu_quota,
+            "mem_limit": task.settings.mem_limit or task.tool.mem_limit,
+        }
+    except OSError as e:
+        raise SolScanError(f"Cannot compute cache key for {task.absfn}\n{e}")
+    return hashlib.sha256(json.dumps(k, sort_keys=True).encode("utf8")).hexdigest()
+
+
+def entry_dir(k):
+    return os.path.join(CACHE_RESULTS, k[:2], k)
+
+
+def lookup(k):
+    """Return the cache entry for key k, or None."""
+    d = entry_dir(k)
+    fn_entry = os.path.join(d, ENTRY)
+    if not os.path.exists(fn_entry):
+        return None
+    try:
+        entry = src.io.read_json(fn_entry)
+        os.utime(d)  # for evicting the least recently used entries
+    except (SolScanError, OSError):
+        return None
+    return entry
+
+
+def materialise(k, rdir):
+    """Copy the tool log and output of the cache entry to the result directory."""
+    d = entry_dir(k)
+    for fn in (src.cfg.TOOL_LOG, src.cfg.TOOL_OUTPUT):
+        if os.path.exists(os.path.join(d, fn)):
+            shutil.copyfile(os.path.join(d, fn), os.path.join(rdir, fn))
+
+
+def store(k, rdir, task_log):
+    """Add the result in rdir to the cache under key k."""
+    exit_code = task_log["result"]["exit_code"]
+    if exit_code in DOCKER_FAILURES:
+        return
+    d = entry_dir(k)
+    if os.path.exists(d):
+        return
+    os.makedirs(os.path.dirname(d), exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=os.path.dirname(d))
+    try:
+        for fn in (src.cfg.TOOL_LOG, src.cfg.TOOL_OUTPUT):
+            if os.path.exists(os.path.join(rdir, fn)):
+                shutil.copyfile(os.path.join(rdir, fn), os.path.join(tmp, fn))
+        src.io.write_json(os.path.join(tmp, ENTRY), {
+            "exit_code": exit_code,
+            "duration": task_log["result"]["duration"],
+            # arguments of the backend, "docker" or "local"
+            "docker": task_log.get("docker", task_log.get("local"))})
+        # atomic, unless another process has been faster
+        os.rename(tmp, d)
+    except OSError:
+        pass
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def evict(max_size):
+    """Remove the least recently used entries until the cache is below max_size bytes."""
+    entries, total = [], 0
+    if not os.path.isdir(CACHE_RESULTS):
+        return 0
+    for prefix in os.scandir(CACHE_RESULTS):
+        if not prefix.is_dir():
+            continue
+        for entry in os.scandir(prefix.path):
+            if not entry.is_dir():
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+            entries.append((entry.stat().st_mtime, size, entry.path))
+            total += size
+    evicted = 0
+    for _, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        evicted += 1
+    return evicted
@@ -4,6 +4,7 @@ import time
 VERSION = "2.0.0"
 HOME = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 SITE_CFG = os.path.join(HOME, "site_cfg.yaml")
+CACHE_HOME = os.path.join(os.path.expanduser("~"), ".cache", "solscan")
 TASK_LOG = "solscan.json"
 TOOLS_HOME = os.path.join(HOME, "tools")
 TOOL_CONFIG = "config.yaml"
@@ -13,3 +14,4 @@ TOOL_LOG = "result.log"
 TOOL_OUTPUT = "result.tar"
 PARSER_OUTPUT = "result.json"
 SARIF_OUTPUT = "result.sarif"
+MANIFEST_EXT = ".json"
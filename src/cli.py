@@ -42,7 +42,8 @@ def cli_args(defaults):
                        nargs="+",
                        type=str,
                        help=f"glob pattern specifying the files to analyse{fmt_default(defaults.files)}"
-                       "; may be prefixed by 'DIR:' for search relative to DIR")
+                       "; may be prefixed by 'DIR:' for search relative to DIR"
+                       f"; a file with extension {src.cfg.MANIFEST_EXT} is read as manifest written by 'index' (relative to DIR, if prefixed)")
     input.add_argument("--runtime",
                        action="store_true",
                        default=None,
@@ -52,7 +53,77 @@ def cli_args(defaults):
     exec.add_argument("--processes",
                       type=int,
                       metavar="N",
-                      help=f"number of parallel processes{fmt_default(defaults.processes)}")
+                      help=f"maximal number of parallel processes{fmt_default(defaults.processes)}")
+    exec.add_argument("--executor",
+                      choices=src.settings.EXECUTORS,
+                      help=f"run each task in one of several processes, or all tasks from an event loop in a single process{fmt_default(defaults.executor)}")
+    exec.add_argument("--parsers",
+                      type=int,
+                      metavar="N",
+                      help=f"number of processes parsing the tool output{fmt_default('same as --processes')}")
+    exec.add_argument("--max-parallel",
+                      metavar="TOOL=N",
+                      nargs="+",
+                      type=str,
+                      help=f"maximal number of parallel tasks for the tool, in addition to tools/TOOL/config.yaml{fmt_default(None)}")
+    exec.add_argument("--cpus",
+                      type=int,
+                      metavar="N",
+                      help=f"cores available to the containers; cpu quotas are reserved from them{fmt_default('all')}")
+    exec.add_argument("--memory",
+                      type=str,
+                      metavar="MEM",
+                      help=f"memory available to the containers, like 32g; memory limits are reserved from it{fmt_default('all')}")
+    exec.add_argument("--pool",
+                      type=int,
+                      metavar="N",
+                      help=f"reuse warm containers, recycling each one after N tasks (0 = new container per task){fmt_default(defaults.pool)}")
+    exec.add_argument("--history",
+                      metavar="DIR",
+                      nargs="+",
+                      type=str,
+                      help=f"folders with previous results, for scheduling long tasks first{fmt_default('durations recorded by previous runs')}")
+    exec.add_argument("--cache",
+                      action="store_true",
+                      default=None,
+                      help=f"reuse results of identical tasks from previous runs{fmt_default(defaults.cache)}")
+    exec.add_argument("--no-cache",
+                      action="store_false",
+                      dest="cache",
+                      help="bypass the result cache, even if enabled by configuration")
+    exec.add_argument("--cache-size",
+                      type=str,
+                      metavar="MEM",
+                      help=f"maximal size of the result cache, like 10g{fmt_default(defaults.cache_size)}")
+    exec.add_argument("--log-limit",
+                      type=str,
+                      metavar="MEM",
+                      help=f"maximal size of the tool log, keeping its head and tail, like 100m{fmt_default(defaults.log_limit)}")
+    exec.add_argument("--output-volume",
+                      action="store_true",
+                      default=None,
+                      help=f"bind output folders of tools to host folders, instead of copying them from the container{fmt_default(defaults.output_volume)}")
+    exec.add_argument("--tmpfs",
+                      type=str,
+                      metavar="MEM",
+                      help=f"memory for tmpfs-backed /src of tools with a tmpfs size; beyond it, /src stays on disk{fmt_default(defaults.tmpfs)}")
+    exec.add_argument("--local",
+                      metavar="TOOL",
+                      nargs="+",
+                      type=str,
+                      help=f"tools to run as local processes instead of docker containers{fmt_default(defaults.local)}")
+    exec.add_argument("--stream",
+                      action="store_true",
+                      default=None,
+                      help=f"start the analysis while collecting the tasks, without scheduling long tasks first{fmt_default(defaults.stream)}")
+    exec.add_argument("--offline",
+                      action="store_true",
+                      default=None,
+                      help=f"select solc versions from the cached list and use installed ones only, without network{fmt_default(defaults.offline)}")
+    exec.add_argument("--solc-mirror",
+                      metavar="DIR|URL",
+                      type=str,
+                      help=f"mirror of solc-bin.ethereum.org to load solc binaries from, as directory or URL{fmt_default(defaults.solc_mirror)}")
     exec.add_argument("--timeout",
                       type=int,
                       metavar="N",
@@ -79,6 +150,14 @@ def cli_args(defaults):
                         type=str,
                         metavar="FILE",
                         help=f"file for log messages{fmt_default(defaults.log)}")
+    output.add_argument("--journal",
+                        type=str,
+                        metavar="FILE",
+                        help=f"file recording the progress of the run{fmt_default(defaults.journal)}")
+    output.add_argument("--resume",
+                        action="store_true",
+                        default=None,
+                        help=f"continue an interrupted run with the same run id, based on its journal{fmt_default(defaults.resume)}")
     output.add_argument("--overwrite",
                         action="store_true",
                         default=None,
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
-import docker, os, shutil, tempfile, requests
-import src.io, io
+import docker, os, shutil, tempfile, requests, shlex, threading, atexit, asyncio, time, tarfile
+import concurrent.futures
+import src.io, src.cfg, src.cache, src.resources, src.logging, src.colors, src.tasks, io
 from src.exceptions import SolScanError
 
 _client = None
@@ -16,48 +17,178 @@ def client():
             raise SolScanError("Docker: Cannot connect to service. Is it installed and running?")
     return _client
 
-images_loaded = set()
+# label identifying the containers of a run
+LABEL = "solscan.runid"
 
-def is_loaded(image):
+def remove_containers(runid):
+    """Remove the containers of the run, e.g. left over by a crash."""
     try:
-        return image in images_loaded or client().images.list(image)
+        containers = client().containers.list(all=True, filters={"label": f"{LABEL}={runid}"})
+        for container in containers:
+            container.remove(force=True)
+        return len(containers)
     except Exception as e:
-        raise SolScanError(f"Docker: checking for image {image} failed.\n{e}")
+        raise SolScanError(f"Docker: removing containers of run {runid} failed.\n{e}")
+
+image_ids = {}
+
+def image_id(image):
+    """Digest identifying the local image."""
+    if image not in image_ids:
+        try:
+            image_ids[image] = client().images.get(image).id
+        except Exception as e:
+            raise SolScanError(f"Docker: inspecting image {image} failed.\n{e}")
+    return image_ids[image]
 
 def load(image):
     try:
-        client().images.pull(image)
-        images_loaded.add(image)
+        return client().images.pull(image)
     except Exception as e:
         raise SolScanError(f"Docker: Loading image {image} failed.\n{e}")
 
-def __docker_volume(task):
-    srcdir = tempfile.mkdtemp()
-    srcdir_bin = os.path.join(srcdir, "bin")
-    if task.tool.mode in ("bytecode","runtime"):
-        # sanitize hex code
-        code = src.io.read_lines(task.absfn)[0].strip()
-        if code.startswith("0x"):
-            code = code[2:]
+def __local_images():
+    # map each tag and digest of the local images to the image id
+    try:
+        images = client().images.list()
+    except Exception as e:
+        raise SolScanError(f"Docker: listing images failed.\n{e}")
+    ids = {}
+    for image in images:
+        for ref in image.tags + image.attrs.get("RepoDigests", []):
+            ids[ref] = image.id
+    return ids
+
+def __qualified(image):
+    # images without tag or digest refer to the tag 'latest'
+    if "@" in image or ":" in image.rsplit("/", 1)[-1]:
+        return image
+    return f"{image}:latest"
+
+def preflight(images, workers=4):
+    """Ensure that the images are available locally, pulling missing ones in parallel.
+
+    Returns a dict mapping each image to the id of the local image.
+    """
+    if not images:
+        # all tools run locally, docker may not even be installed
+        return {}
+    local = __local_images()
+    missing = []
+    for image in sorted(set(images)):
+        ref = __qualified(image)
+        if ref in local:
+            image_ids[image] = local[ref]
+        else:
+            missing.append(image)
+    if missing:
+        src.logging.message(f"Loading {len(missing)} docker image(s), may take a while ...")
+        failures = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            pulls = {executor.submit(load, image): image for image in missing}
+            for i, pull in enumerate(concurrent.futures.as_completed(pulls), 1):
+                image = pulls[pull]
+                try:
+                    image_ids[image] = pull.result().id
+                    src.logging.message(f"{i}/{len(missing)}: loaded {image}", "")
+                except SolScanError as e:
+                    failures.append(str(e))
+        if failures:
+            raise SolScanError("\n".join(failures))
+    return {image: image_ids[image] for image in images}
+
+# Tool scripts and solc binaries are kept in a shared store, one folder per
+# combination of bin folder and solc version, which is mounted read-only.
+BIN_STORE = os.path.join(src.cfg.CACHE_HOME, "bin")
+BIN_MOUNT = "/solscan"
+
+def __bin_store(task):
+    name = "-".join((
+        task.tool.id,
+        (src.cache.bin_hash(task.tool) or "nobin")[:16],
+        str(task.solc_version) if task.solc_path else "nosolc"))
+    bindir = os.path.join(BIN_STORE, name)
+    if os.path.isdir(bindir):
+        return name
+    os.makedirs(BIN_STORE, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=BIN_STORE, prefix=".")
+    try:
+        tmp_bin = os.path.join(tmp, "bin")
+        if task.tool.bin:
+            shutil.copytree(task.tool.absrcin, tmp_bin)
+        else:
+            os.mkdir(tmp_bin)
+        if task.solc_path:
+            tmp_solc = os.path.join(tmp_bin, "solc")
+            try:
+                os.link(task.solc_path, tmp_solc)
+            except OSError:
+                shutil.copyfile(task.solc_path, tmp_solc)
+            if not os.access(tmp_solc, os.X_OK):
+                os.chmod(tmp_solc, 0o755)
+        try:
+            os.rename(tmp_bin, bindir)
+        except OSError:
+            # another process has been faster
+            if not os.path.isdir(bindir):
+                raise
+    except OSError as e:
+        raise SolScanError(f"Cannot prepare {bindir}\n{e}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return name
+
+def __output_volume(task):
+    # only output folders (path ending in /) can be bound to a host folder
+    output = task.tool.output
+    return task.settings.output_volume and output and output.endswith("/")
+
+def __docker_volume(tasks, srcdir=None):
+    # Solidity files are mounted read-only into the scratch folder /src,
+    # except for pooled containers (srcdir given), whose mounts are fixed.
+    mount = srcdir is None
+    if mount:
+        srcdir = tempfile.mkdtemp()
+    volumes = {}
+    outdir = None
+    if mount and __output_volume(tasks[0]):
+        outdir = tempfile.mkdtemp()
+        volumes[outdir] = {"bind": tasks[0].tool.output.rstrip("/"), "mode": "rw"}
+    for task in tasks:
         _,filename = os.path.split(task.absfn)
-        src.io.write_txt(os.path.join(srcdir,filename), code)
-    else:
-        shutil.copy(task.absfn, srcdir)
-    if task.tool.bin:
-        shutil.copytree(task.tool.absrcin, srcdir_bin)
-    else:
-        os.mkdir(srcdir_bin)
-    if task.solc_path:
-        srcdir_bin_solc = os.path.join(srcdir_bin, "solc")
-        shutil.copyfile(task.solc_path, srcdir_bin_solc)
-    return srcdir
+        if task.tool.mode in ("bytecode","runtime"):
+            src.io.write_txt(os.path.join(srcdir,filename), src.tasks.hex_code(task))
+            if task.tmpfs:
+                volumes[os.path.join(srcdir,filename)] = {"bind": f"/src/{filename}", "mode": "ro"}
+        elif mount:
+            volumes[task.absfn] = {"bind": f"/src/{filename}", "mode": "ro"}
+        else:
+            shutil.copy(task.absfn, srcdir)
+    return srcdir, volumes, outdir
+
+def __volumes(srcdir, volumes={}):
+    # without srcdir, /src is a tmpfs mount
+    return {
+        **({srcdir: {"bind": "/src", "mode": "rw"}} if srcdir else {}),
+        BIN_STORE: {"bind": BIN_MOUNT, "mode": "ro"},
+        **volumes
+    }
 
-def __docker_args(task, srcdir):
+def __tmpfs(task):
+    size = f"size={task.tool.tmpfs}"
+    return {path: size for path in ["/src"] + (task.tool.scratch or [])}
+
+def __docker_args(tasks, srcdir, volumes={}):
+    task = tasks[0]
+    bindir = f"{BIN_MOUNT}/{__bin_store(task)}" # path in Linux Docker image
     args = {
-        "volumes": {srcdir: {"bind": "/src", "mode": "rw"}},
+        "volumes": __volumes(None if task.tmpfs else srcdir, volumes),
         "detach": True,
-        "user": 0
+        "user": 0,
+        "labels": {LABEL: task.settings.runid}
     }
+    if task.tmpfs:
+        args["tmpfs"] = __tmpfs(task)
     for k in ("image","cpu_quota","mem_limit"):
         v = getattr(task.tool, k, None)
         if v is not None:
@@ -68,30 +199,417 @@ def __docker_args(task, srcdir):
             args[k] = v
     _,filename = os.path.split(task.absfn)
     filename = f"/src/{filename}" # path in Linux Docker image
-    timeout = task.settings.timeout or "0"
-    args['command'] = task.tool.command(filename, timeout, "/src/bin")
-    args['entrypoint'] = task.tool.entrypoint(filename, timeout, "/src/bin")
+    timeout = src.tasks.timeout(tasks) or "0"
+    args['command'] = task.tool.command(filename, timeout, bindir, task.contract)
+    args['entrypoint'] = task.tool.entrypoint(filename, timeout, bindir, task.contract)
     return args
 
+def __log_file(task):
+    # the log of a batch ends up in the result folder of its first task
+    return os.path.join(task.rdir, src.cfg.TOOL_LOG)
+
+def __write_log(task, chunks):
+    limit = src.resources.mem_bytes(task.settings.log_limit)
+    src.io.write_chunks(__log_file(task), chunks, limit)
+
+def __log_collector(task, chunks):
+    # streams the log to the result folder while the container is running
+    collector = threading.Thread(target=__write_log, args=(task, chunks), daemon=True)
+    collector.start()
+    return collector
+
+def __log_lines(task):
+    fn = __log_file(task)
+    if os.path.exists(fn) and os.path.getsize(fn) == 0:
+        os.remove(fn)
+    return src.io.read_log(fn)
+
+def __output(task, container, outdir):
+    if not outdir:
+        output,_ = container.get_archive(task.tool.output)
+        return b''.join(output)
+    # pack the output folder on the host, in the same layout as get_archive
+    fn = os.path.join(task.rdir, src.cfg.TOOL_OUTPUT)
+    try:
+        with tarfile.open(fn, "w") as tar:
+            tar.add(outdir, arcname=os.path.basename(task.tool.output.rstrip("/")))
+    except Exception as e:
+        raise SolScanError(f"Cannot pack output of {task.tool.id}\n{e}")
+    return src.io.BinFile(fn)
+
+def __remove_dirs(*dirs):
+    # files written by the root user of a container to an output volume may
+    # not be removable by the host user; they are reported and left behind
+    for d in dirs:
+        if d:
+            failed = []
+            shutil.rmtree(d, onerror=lambda function, path, excinfo: failed.append(path))
+            if failed:
+                src.logging.message(src.colors.warning(
+                    f"Cannot remove {len(failed)} path(s) below {d}, like {failed[0]}"))
+
+# Resource telemetry
+#
+# A single thread per process polls the stats of all running containers
+# about once per second, instead of a thread and a connection per container.
+# Pooled containers outlive their tasks, so for them cpu time and block i/o
+# count from the first sample.
+
+TELEMETRY_INTERVAL = 1.0
+
+_watched = []  # telemetry records of the running containers
+_watched_lock = threading.Lock()
+_watch_added = threading.Event()
+_poller = None
+
+def __blkio(stats, op):
+    entries = (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []
+    return sum(e.get("value", 0) for e in entries if e.get("op", "").lower() == op)
+
+def __stats(container):
+    # one-shot: a single sample, without waiting for a second one to compute cpu deltas
+    api = client().api
+    url = f"{api.base_url}/v{api.api_version}/containers/{container.id}/stats"
+    response = api.get(url, params={"stream": "false", "one-shot": "true"}, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+def __sample(watch):
+    stats = __stats(watch["container"])
+    cpu = ((stats.get("cpu_stats") or {}).get("cpu_usage") or {}).get("total_usage")
+    if cpu is None:
+        return
+    memory = stats.get("memory_stats") or {}
+    current = (cpu / 1e9, __blkio(stats, "read"), __blkio(stats, "write"))
+    with _watched_lock:
+        summary = watch["summary"]
+        if watch["base"] is None:
+            watch["base"] = current if watch["relative"] else (0.0, 0, 0)
+        base = watch["base"]
+        peak = memory.get("usage") or 0
+        if not watch["relative"]:
+            # cgroup v1 only; covers the peaks between samples
+            peak = max(peak, memory.get("max_usage") or 0)
+        summary["memory_peak"] = max(summary.get("memory_peak", 0), peak)
+        summary["cpu_seconds"] = round(current[0] - base[0], 3)
+        summary["block_read"] = current[1] - base[1]
+        summary["block_write"] = current[2] - base[2]
+        summary["samples"] = summary.get("samples", 0) + 1
+
+def __poll():
+    while True:
+        with _watched_lock:
+            idle = not _watched
+        _watch_added.wait(None if idle else TELEMETRY_INTERVAL)
+        _watch_added.clear()
+        with _watched_lock:
+            watched = list(_watched)
+        for watch in watched:
+            try:
+                __sample(watch)
+            except Exception:
+                # telemetry is best effort
+                pass
+
+def __telemetry(container, relative=False):
+    global _poller
+    watch = {"container": container, "relative": relative, "base": None, "summary": {}}
+    with _watched_lock:
+        _watched.append(watch)
+        if _poller is None:
+            _poller = threading.Thread(target=__poll, daemon=True)
+            _poller.start()
+    # sample the new container right away
+    _watch_added.set()
+    return watch
+
+def __unwatch(telemetry):
+    # stop sampling; idempotent, for the cleanup after exceptions
+    if telemetry:
+        with _watched_lock:
+            _watched[:] = [watch for watch in _watched if watch is not telemetry]
+
+def __resources(telemetry, args, container=None):
+    __unwatch(telemetry)
+    with _watched_lock:
+        resources = dict(telemetry["summary"])
+    if not resources:
+        return None
+    mem_limit = src.resources.mem_bytes(args.get("mem_limit"))
+    resources["mem_limit_reached"] = bool(mem_limit and resources["memory_peak"] >= 0.99 * mem_limit)
+    if container:
+        try:
+            container.reload()
+            resources["oom_killed"] = container.attrs["State"]["OOMKilled"]
+            resources["mem_limit_reached"] |= resources["oom_killed"]
+        except Exception:
+            pass
+    return resources
+
 def execute(task):
-    srcdir = __docker_volume(task)
-    args = __docker_args(task, srcdir)
-    exit_code,logs,output,container = None,[],None,None
+    return execute_batch([task])
+
+def execute_batch(tasks):
+    """Analyse several contracts with the same tool in a single container.
+
+    The contracts are placed side by side in /src, and $FILENAME refers to
+    the first one. Only tools analysing the whole directory (config
+    attribute 'batch') will process all of them.
+    """
+    task = tasks[0]
+    if task.settings.pool:
+        return __execute_pooled(tasks)
+    srcdir, volumes, outdir = __docker_volume(tasks)
+    args = __docker_args(tasks, srcdir, volumes)
+    exit_code,logs,output,container,resources,telemetry = None,[],None,None,None,None
     try:
         container = client().containers.run(**args)
+        telemetry = __telemetry(container)
+        collector = __log_collector(task, container.logs(stream=True, follow=True))
         try:
-            result = container.wait(timeout=task.settings.timeout)
+            result = container.wait(timeout=src.tasks.timeout(tasks))
             exit_code = result["StatusCode"]
         except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError):
             # The docs say that timeout raises ReadTimeout, but sometimes it is ConnectionError
             container.stop(timeout=0)
-        logs = container.logs().decode("utf8").splitlines()
+        resources = __resources(telemetry, args, container)
+        collector.join()
+        logs = __log_lines(task)
         if task.tool.output:
-            output,_ = container.get_archive(task.tool.output)
-            output = b''.join(output)
+            output = __output(task, container, outdir)
     finally:
+        __unwatch(telemetry)
         if container:
             container.stop(timeout=0)
             container.remove()
-        shutil.rmtree(srcdir)
-    return exit_code, logs, output, args
+        __remove_dirs(srcdir, outdir)
+    return exit_code, logs, output, args, resources
+
+
+# Warm container pool
+#
+# Instead of creating a container per task, long-lived containers are kept
+# per image and resource limits. Each task is executed via 'docker exec' in
+# an idle container, with /src bound to a host directory that is cleared and
+# repopulated for every task. A container is recycled after 'pool' tasks, or
+# as soon as a task times out, is killed by a signal, cannot be started or
+# raises an exception. A tool reporting findings or errors by a non-zero
+# exit code leaves the container intact.
+
+KEEP_ALIVE = ["/bin/sh", "-c", "while :; do sleep 3600; done"]
+
+class PooledContainer:
+    def __init__(self, key, container, srcdir):
+        self.key = key
+        self.container = container
+        self.srcdir = srcdir
+        self.tasks = 0
+
+_pool = {}  # key -> list of idle pooled containers
+_pool_lock = threading.Lock()
+_image_configs = {}
+
+def __image_config(image):
+    if image not in _image_configs:
+        try:
+            _image_configs[image] = client().images.get(image).attrs.get("Config") or {}
+        except Exception as e:
+            raise SolScanError(f"Docker: inspecting image {image} failed.\n{e}")
+    return _image_configs[image]
+
+def __exec_cmd(args):
+    # mimic 'docker run': an explicit entrypoint resets the default command of the image
+    config = __image_config(args["image"])
+    if args.get("entrypoint"):
+        cmd = shlex.split(args["entrypoint"])
+    else:
+        cmd = list(config.get("Entrypoint") or [])
+    if args.get("command"):
+        cmd += shlex.split(args["command"])
+    elif not args.get("entrypoint"):
+        cmd += list(config.get("Cmd") or [])
+    return cmd
+
+def __pool_acquire(key, args):
+    with _pool_lock:
+        idle = _pool.get(key)
+        if idle:
+            return idle.pop()
+    srcdir = tempfile.mkdtemp()
+    pool_args = {k: v for k, v in args.items() if k not in ("command", "entrypoint")}
+    pool_args["volumes"] = __volumes(srcdir)
+    pool_args["entrypoint"] = KEEP_ALIVE
+    try:
+        container = client().containers.run(**pool_args)
+    except Exception:
+        shutil.rmtree(srcdir, ignore_errors=True)
+        raise
+    return PooledContainer(key, container, srcdir)
+
+def __pool_discard(pooled):
+    try:
+        pooled.container.stop(timeout=0)
+        pooled.container.remove(force=True)
+    except Exception:
+        pass
+    shutil.rmtree(pooled.srcdir, ignore_errors=True)
+
+def __pool_release(pooled, reuse):
+    if reuse:
+        with _pool_lock:
+            _pool.setdefault(pooled.key, []).append(pooled)
+    else:
+        __pool_discard(pooled)
+
+def __reusable(exit_code):
+    # 125-127: failure of docker or of starting the command, >=128: killed by a signal (e.g. OOM)
+    return exit_code is not None and 0 <= exit_code < 125
+
+def __pool_reset(pooled, task):
+    # remove the traces of the previous task from /src and from the output location
+    paths = ["/src/*", "/src/.[!.]*"]
+    if task.tool.output:
+        paths.append(shlex.quote(task.tool.output))
+    cmd = ["/bin/sh", "-c", f"rm -rf {' '.join(paths)}"]
+    result = pooled.container.exec_run(cmd, user="0")
+    if result.exit_code != 0:
+        raise SolScanError(f"Docker: cannot reset pooled container for {task.tool.image}")
+
+def __exec(container, cmd, timeout, task, args):
+    api = client().api
+    exec_id = api.exec_create(container.id, cmd, user="0")["Id"]
+    telemetry = __telemetry(container, relative=True)
+    try:
+        collector = __log_collector(task, api.exec_start(exec_id, stream=True))
+        collector.join(timeout)
+        if collector.is_alive():
+            # timeout: killing the container is the only way to stop the exec'ed process
+            container.stop(timeout=0)
+            collector.join()
+            exit_code = None
+        else:
+            exit_code = api.exec_inspect(exec_id)["ExitCode"]
+        return exit_code, __log_lines(task), __resources(telemetry, args)
+    finally:
+        __unwatch(telemetry)
+
+def __execute_pooled(tasks):
+    task = tasks[0]
+    args = __docker_args(tasks, None)
+    key = (args["image"], args.get("cpu_quota"), args.get("mem_limit"))
+    pooled = __pool_acquire(key, args)
+    args["volumes"] = __volumes(pooled.srcdir)
+    args["pool"] = True
+    exit_code,logs,output,resources,reuse = None,[],None,None,False
+    try:
+        if pooled.tasks > 0:
+            __pool_reset(pooled, task)
+        pooled.tasks += 1
+        __docker_volume(tasks, pooled.srcdir)
+        exit_code, logs, resources = __exec(pooled.container, __exec_cmd(args), src.tasks.timeout(tasks), task, args)
+        if task.tool.output:
+            output,_ = pooled.container.get_archive(task.tool.output)
+            output = b''.join(output)
+        reuse = __reusable(exit_code) and pooled.tasks < task.settings.pool
+    finally:
+        __pool_release(pooled, reuse)
+    return exit_code, logs, output, args, resources
+
+def shutdown():
+    """Remove all containers kept in the pool of this process."""
+    with _pool_lock:
+        pooled = [p for idle in _pool.values() for p in idle]
+        _pool.clear()
+    for p in pooled:
+        __pool_discard(p)
+
+atexit.register(shutdown)
+
+
+# Asynchronous execution
+#
+# Used by the asyncio executor, which drives many containers from a single
+# process. Short API calls are run in the default thread pool of the event
+# loop, whereas the end of containers is signalled by the docker event
+# stream, so waiting for a container does not occupy a thread.
+
+# interval [s] for checking on containers, in case the event stream misses an exit
+POLL_INTERVAL = 60
+
+_exits = {}  # container id -> future receiving the exit code
+_exits_lock = threading.Lock()
+_watcher = None
+
+def __resolve(future, exit_code):
+    if not future.done():
+        future.set_result(exit_code)
+
+def __watch_events(loop):
+    # a separate client, since the event stream occupies its connection
+    events = docker.from_env().events(decode=True, filters={"type": "container", "event": "die"})
+    for event in events:
+        actor = event.get("Actor", {})
+        with _exits_lock:
+            future = _exits.get(actor.get("ID"))
+        if future:
+            exit_code = int(actor.get("Attributes", {}).get("exitCode", -1))
+            loop.call_soon_threadsafe(__resolve, future, exit_code)
+
+def __ensure_watcher(loop):
+    global _watcher
+    if not _watcher or not _watcher.is_alive():
+        _watcher = threading.Thread(target=__watch_events, args=(loop,), daemon=True)
+        _watcher.start()
+
+async def __wait(loop, container, exited, timeout):
+    deadline = time.time() + timeout if timeout else None
+    while True:
+        interval = POLL_INTERVAL if deadline is None else min(POLL_INTERVAL, deadline - time.time())
+        if interval <= 0:
+            return None
+        try:
+            return await asyncio.wait_for(asyncio.shield(exited), interval)
+        except asyncio.TimeoutError:
+            state = await loop.run_in_executor(None, lambda: client().api.inspect_container(container.id)["State"])
+            if not state["Running"]:
+                return state["ExitCode"]
+
+async def execute_batch_async(tasks):
+    """Coroutine version of execute_batch."""
+    loop = asyncio.get_event_loop()
+    task = tasks[0]
+    if task.settings.pool:
+        # exec'ed processes do not show up in the event stream
+        return await loop.run_in_executor(None, execute_batch, tasks)
+    __ensure_watcher(loop)
+    srcdir, volumes, outdir = await loop.run_in_executor(None, __docker_volume, tasks)
+    args = await loop.run_in_executor(None, __docker_args, tasks, srcdir, volumes)
+    create_args = {k: v for k, v in args.items() if k != "detach"}
+    exit_code,logs,output,container,resources,telemetry = None,[],None,None,None,None
+    try:
+        container = await loop.run_in_executor(None, lambda: client().containers.create(**create_args))
+        exited = loop.create_future()
+        with _exits_lock:
+            _exits[container.id] = exited
+        await loop.run_in_executor(None, container.start)
+        telemetry = __telemetry(container)
+        exit_code = await __wait(loop, container, exited, src.tasks.timeout(tasks))
+        if exit_code is None:
+            await loop.run_in_executor(None, lambda: container.stop(timeout=0))
+        resources = await loop.run_in_executor(None, __resources, telemetry, args, container)
+        # streamed after the exit, to keep the threads free while containers run
+        await loop.run_in_executor(None, lambda: __write_log(task, container.logs(stream=True)))
+        logs = await loop.run_in_executor(None, __log_lines, task)
+        if task.tool.output:
+            output = await loop.run_in_executor(None, __output, task, container, outdir)
+    finally:
+        __unwatch(telemetry)
+        if container:
+            with _exits_lock:
+                _exits.pop(container.id, None)
+            def remove():
+                container.stop(timeout=0)
+                container.remove()
+            await loop.run_in_executor(None, remove)
+        await loop.run_in_executor(None, __remove_dirs, srcdir, outdir)
+    return exit_code, logs, output, args, resources
@@ -0,0 +1,138 @@
+import os
+import argparse
+import hashlib
+import multiprocessing
+import sys
+import src.cfg
+import src.io
+import src.solidity
+import src.solscan
+from src.exceptions import SolScanError
+
+
+MANIFEST_VERSION = 1
+
+
+def is_manifest(spec):
+    return spec.endswith(src.cfg.MANIFEST_EXT)
+
+
+def index_file(absfn):
+    """Describe a single contract file by an entry of the manifest."""
+    try:
+        with open(absfn, "rb") as f:
+            data = f.read()
+    except Exception as e:
+        raise SolScanError(e)
+    entry = {
+        "size": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+    }
+    if absfn.endswith(".sol"):
+        entry["pragma"] = src.solidity.scan_pragma(data)
+        entry["contracts"] = src.solidity.get_contracts(data)
+    else:
+        prg = data.decode("utf-8", errors="replace").splitlines()
+        code = prg[0].strip() if prg else ""
+        if code.startswith("0x"):
+            code = code[2:]
+        entry["bytecode_length"] = len(code) // 2
+    return entry
+
+
+def write_manifest(fn, files, processes=1):
+    """Index the files, given as pairs (absfn, relfn), and write the manifest.
+
+    Paths below the location of the manifest are stored relative to it, such
+    that the dataset can be moved together with its manifest.
+    """
+    files = sorted(set(files))
+    if processes > 1:
+        # spawn processes, instead of forking, to have same behavior under Linux and MacOS
+        mp = multiprocessing.get_context("spawn")
+        with mp.Pool(processes) as pool:
+            entries = pool.map(index_file, [absfn for absfn, _ in files], chunksize=16)
+    else:
+        entries = [index_file(absfn) for absfn, _ in files]
+
+    # resolve the solc versions once per pragma, in the main process
+    online = src.solidity.ensure_solc_versions_loaded()
+    versions = {}
+    mandir = os.path.dirname(os.path.abspath(fn))
+    for (absfn, relfn), entry in zip(files, entries):
+        path = os.path.relpath(absfn, mandir)
+        entry["path"] = absfn if path.startswith(os.pardir) else path
+        entry["relfn"] = relfn
+        if "pragma" in entry:
+            pragma = entry["pragma"]
+            if pragma not in versions:
+                version = src.solidity.get_solc_version(pragma)
+                versions[pragma] = str(version) if version else None
+            entry["solc"] = versions[pragma]
+
+    src.io.write_json(fn, {"version": MANIFEST_VERSION, "files": entries})
+    return entries, online
+
+
+def read_manifest(fn):
+    """Return the files listed in the manifest as triples (absfn, relfn, entry)."""
+    manifest = src.io.read_json(fn)
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        raise SolScanError(f"{fn}: not a manifest of version {MANIFEST_VERSION}")
+    mandir = os.path.dirname(os.path.abspath(fn))
+    files = []
+    for entry in manifest.get("files", []):
+        absfn = os.path.normpath(os.path.join(mandir, entry["path"]))
+        files.append((absfn, entry["relfn"], entry))
+    return files
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        prog="index",
+        description="Write a manifest of the contracts, to be passed to solscan via -f instead of the patterns.")
+    argparser.add_argument("--processes",
+                           type=int,
+                           metavar="N",
+                           default=1,
+                           help="number of parallel processes (default 1)")
+    argparser.add_argument("-v",
+                           action='store_true',
+                           help="show statistics")
+    argparser.add_argument("manifest",
+                           metavar="MANIFEST",
+                           help=f"file to write the manifest to, with extension {src.cfg.MANIFEST_EXT}")
+    argparser.add_argument("files",
+                           nargs="+",
+                           metavar="PATTERN",
+                           help="glob pattern or .txt dataset specifying the files to index, as for solscan -f")
+
+    if len(sys.argv) == 1:
+        argparser.print_help(sys.stderr)
+        sys.exit(1)
+
+    args = argparser.parse_args()
+    if not is_manifest(args.manifest):
+        argparser.error(f"manifest must have extension {src.cfg.MANIFEST_EXT}")
+
+    try:
+        patterns = []
+        for pattern in args.files:
+            root, spec = pattern.split(":", 1) if ":" in pattern else (None, pattern)
+            patterns.append((root, spec))
+        files = [(absfn, relfn) for absfn, relfn, _ in src.solscan.collect_files(patterns)]
+        entries, online = write_manifest(args.manifest, files, args.processes)
+    except SolScanError as e:
+        sys.exit(f"index: {e}")
+
+    if not online:
+        print("Warning: failed to load list of solc versions; resolved against the installed ones.", file=sys.stderr)
+    unresolved = [e["path"] for e in entries if "pragma" in e and not e["solc"]]
+    for path in unresolved:
+        print(f"Warning: {path}: cannot determine Solidity version", file=sys.stderr)
+    if args.v:
+        print(f"{len(entries)} files indexed, {len(unresolved)} without solc version")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 import yaml
 import json
+import os
+import collections
 from src.exceptions import SolScanError
 
 
@@ -37,6 +39,95 @@ def read_lines(fn):
         raise SolScanError(e)
 
 
+class LogLines:
+    """Lines of a text file, read lazily whenever they are iterated.
+
+    Stands in for the list of lines of a tool log, without holding the log
+    in memory. Supports iteration, truth value, 'in' and indexing.
+    """
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __iter__(self):
+        with open(self.fn, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                yield line.rstrip("\n")
+
+    def __bool__(self):
+        return os.path.getsize(self.fn) > 0
+
+    def __contains__(self, line):
+        return any(l == line for l in self)
+
+    def __getitem__(self, i):
+        if i < 0:
+            lines = collections.deque(self, maxlen=-i)
+            if len(lines) == -i:
+                return lines[0]
+        else:
+            for j, line in enumerate(self):
+                if i == j:
+                    return line
+        raise IndexError("log line index out of range")
+
+
+class BinFile:
+    """Binary file standing in for its contents, which are read on demand."""
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __bool__(self):
+        return os.path.getsize(self.fn) > 0
+
+    def read(self):
+        return read_bin(self.fn)
+
+
+def read_log(fn):
+    return LogLines(fn) if os.path.exists(fn) else []
+
+
+def write_chunks(fn, chunks, limit=None):
+    """Write byte chunks to fn as they arrive.
+
+    With a limit, only the first and the last limit/2 bytes are kept,
+    separated by a line with the number of bytes omitted.
+    """
+    try:
+        with open(fn, 'wb') as f:
+            if not limit:
+                for chunk in chunks:
+                    f.write(chunk)
+                return
+            head, tail_limit = limit // 2, limit - limit // 2
+            written, omitted = 0, 0
+            tail, tail_size = collections.deque(), 0
+            for chunk in chunks:
+                if written < head:
+                    part = chunk[:head-written]
+                    f.write(part)
+                    written += len(part)
+                    chunk = chunk[len(part):]
+                    if not chunk:
+                        continue
+                tail.append(chunk)
+                tail_size += len(chunk)
+                while tail and tail_size - len(tail[0]) >= tail_limit:
+                    omitted += len(tail[0])
+                    tail_size -= len(tail.popleft())
+            excess = tail_size - tail_limit
+            if excess > 0:
+                tail[0] = tail[0][excess:]
+                omitted += excess
+            if omitted:
+                f.write(f"\n[... {omitted} bytes omitted ...]\n".encode('utf-8'))
+            f.writelines(tail)
+    except Exception as e:
+        raise SolScanError(e)
+
+
 def write_txt(fn, output):
     try:
         with open(fn, 'w', encoding='utf-8') as f:
@@ -49,6 +140,22 @@ def write_txt(fn, output):
         raise SolScanError(e)
 
 
+def append_txt(fn, output):
+    """Append the string to fn with a single write.
+
+    Several processes can append to the same file concurrently, without
+    their writes interleaving; a crash leaves at most a partial last write.
+    """
+    try:
+        fd = os.open(fn, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, output.encode('utf-8'))
+        finally:
+            os.close(fd)
+    except Exception as e:
+        raise SolScanError(e)
+
+
 def read_bin(fn):
     try:
         with open(fn, 'rb') as f:
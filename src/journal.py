@@ -0,0 +1,52 @@
+import json
+import os
+import src.io
+from src.exceptions import SolScanError
+
+ENQUEUED = "enqueued"
+STARTED = "started"
+DONE = "done"
+
+
+class Journal:
+    """Append-only record of the progress of a run.
+
+    Each line is a JSON object with the event and the result directory of
+    the task. Lines are appended with a single write, such that several
+    processes can share the journal, and a crash leaves at most a partial
+    last line, which is ignored when reading.
+    """
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def create(self, overwrite):
+        folder = os.path.dirname(self.fn)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        if overwrite:
+            open(self.fn, "w").close()
+
+    def write(self, event, rdirs):
+        data = "".join(json.dumps({"event": event, "rdir": rdir}) + "\n" for rdir in rdirs)
+        try:
+            src.io.append_txt(self.fn, data)
+        except SolScanError as e:
+            raise SolScanError(f"Cannot write to journal {self.fn}\n{e}")
+
+    def read(self):
+        """Return a dict mapping result directories to their latest state."""
+        states = {}
+        if not os.path.exists(self.fn):
+            return states
+        try:
+            with open(self.fn, "r", encoding="utf8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    states[entry["rdir"]] = entry["event"]
+        except Exception as e:
+            raise SolScanError(f"Cannot read journal {self.fn}\n{e}")
+        return states
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+"""Execution of tools as local processes, without docker.
+
+The counterpart of src.docker for tools installed on the host. The entry
+point of the tool runs in a scratch folder, which takes the place of /src,
+with $BIN pointing to a copy of the tool's bin folder. Paths within the
+container, like the output location, are mapped to the folder given by the
+environment variable SOLSCAN_ROOT, which is empty in containers; scripts
+meant to run locally write their output to "$SOLSCAN_ROOT/...".
+"""
+
+import asyncio, os, shlex, shutil, signal, subprocess, tarfile, tempfile, threading, time
+import src.cfg, src.io, src.resources, src.tasks
+from src.exceptions import SolScanError
+
+
+def __scratch(tasks):
+    scratch = tempfile.mkdtemp()
+    srcdir = os.path.join(scratch, "src")
+    os.mkdir(srcdir)
+    for task in tasks:
+        _,filename = os.path.split(task.absfn)
+        if task.tool.mode in ("bytecode","runtime"):
+            src.io.write_txt(os.path.join(srcdir,filename), src.tasks.hex_code(task))
+        else:
+            os.symlink(task.absfn, os.path.join(srcdir,filename))
+    task = tasks[0]
+    bindir = os.path.join(scratch, "bin")
+    if task.tool.bin:
+        shutil.copytree(task.tool.absrcin, bindir)
+        # the scripts are executed directly, as in the containers
+        for fn in os.listdir(bindir):
+            fn = os.path.join(bindir, fn)
+            if os.path.isfile(fn):
+                os.chmod(fn, os.stat(fn).st_mode | 0o111)
+    else:
+        os.mkdir(bindir)
+    if task.solc_path:
+        os.symlink(task.solc_path, os.path.join(bindir, "solc"))
+    return scratch
+
+def __args(tasks, scratch):
+    task = tasks[0]
+    srcdir = os.path.join(scratch, "src")
+    bindir = os.path.join(scratch, "bin")
+    _,filename = os.path.split(task.absfn)
+    filename = os.path.join(srcdir, filename)
+    timeout = src.tasks.timeout(tasks) or "0"
+    entrypoint = task.tool.entrypoint(filename, timeout, bindir, task.contract)
+    command = task.tool.command(filename, timeout, bindir, task.contract)
+    if not entrypoint:
+        raise SolScanError(f"Tool {task.tool.id}/{task.tool.mode} needs the entrypoint of its image, cannot run locally")
+    args = {
+        "cmd": shlex.split(entrypoint) + (shlex.split(command) if command else []),
+    }
+    mem_limit = task.settings.mem_limit or task.tool.mem_limit
+    if mem_limit:
+        args["mem_limit"] = mem_limit
+    return args
+
+def __task_args(args, scratch):
+    # recorded in the task log, without the paths of the host
+    task_args = dict(args)
+    task_args["cmd"] = [arg.replace(scratch, "$SCRATCH") for arg in args["cmd"]]
+    return task_args
+
+def __limited(cmd):
+    # no core dumps; applied by a shell wrapper, as preexec_fn is not safe
+    # with threads, like those of the asyncio executor
+    return ["/bin/sh", "-c", 'ulimit -c 0; exec "$@"', "sh"] + cmd
+
+# The memory limit applies to the resident memory of the tool and its child
+# processes, like the cgroup limit of a container. An address space limit
+# (RLIMIT_AS) would break tools reserving large virtual memory, like the JVM
+# or node. The resident memory is read from /proc, such that the limit is
+# enforced on Linux only.
+
+MEMORY_INTERVAL = 0.5
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def __rss(pgid):
+    rss = 0
+    try:
+        pids = os.listdir("/proc")
+    except OSError:
+        return None
+    for pid in pids:
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                # the fields after the command, which may contain spaces
+                fields = f.read().rsplit(b")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[2]) == pgid:
+            rss += int(fields[21]) * PAGE_SIZE
+    return rss
+
+def __wait(waiter, pgid, timeout, mem_limit):
+    """Wait for the waiter thread, until the process group exceeds the time
+    or memory limit. Returns whether it ran out of time or memory, and the
+    peak of the resident memory observed."""
+    if not mem_limit:
+        waiter.join(timeout)
+        return waiter.is_alive(), False, 0
+    deadline = time.monotonic() + timeout if timeout else None
+    peak = 0
+    while True:
+        interval = MEMORY_INTERVAL
+        if deadline is not None:
+            interval = min(interval, deadline - time.monotonic())
+        waiter.join(max(interval, 0))
+        if not waiter.is_alive():
+            return False, False, peak
+        if deadline is not None and time.monotonic() >= deadline:
+            return True, False, peak
+        rss = __rss(pgid) or 0
+        peak = max(peak, rss)
+        if rss > mem_limit:
+            return False, True, peak
+
+def __exit_code(status):
+    # same convention as docker: 128+n for processes killed by signal n
+    if os.WIFSIGNALED(status):
+        return 128 + os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+def __resources(rusage, args, rss_peak=0):
+    # ru_maxrss is in kilobytes, block counts are in units of 512 bytes;
+    # rss_peak covers descendants killed before being waited for
+    memory_peak = max(rusage.ru_maxrss * 1024, rss_peak)
+    mem_limit = src.resources.mem_bytes(args.get("mem_limit"))
+    return {
+        "memory_peak": memory_peak,
+        "cpu_seconds": round(rusage.ru_utime + rusage.ru_stime, 3),
+        "block_read": rusage.ru_inblock * 512,
+        "block_write": rusage.ru_oublock * 512,
+        "mem_limit_reached": bool(mem_limit and memory_peak >= 0.99 * mem_limit),
+    }
+
+def __output(task, root):
+    # pack the output in the same layout as docker's get_archive
+    path = os.path.join(root, task.tool.output.strip("/"))
+    if not os.path.exists(path):
+        return None
+    fn = os.path.join(task.rdir, src.cfg.TOOL_OUTPUT)
+    try:
+        with tarfile.open(fn, "w") as tar:
+            tar.add(path, arcname=os.path.basename(task.tool.output.rstrip("/")))
+    except Exception as e:
+        raise SolScanError(f"Cannot pack output of {task.tool.id}\n{e}")
+    return src.io.BinFile(fn)
+
+def execute(task):
+    return execute_batch([task])
+
+def execute_batch(tasks):
+    """Analyse one or several contracts with the same tool in a local process.
+
+    Returns the same results as src.docker.execute_batch.
+    """
+    task = tasks[0]
+    scratch = __scratch(tasks)
+    args = __args(tasks, scratch)
+    root = os.path.join(scratch, "root")
+    os.mkdir(root)
+    env = dict(os.environ, SOLSCAN_ROOT=root)
+    fn_log = os.path.join(task.rdir, src.cfg.TOOL_LOG)
+    exit_code,logs,output,resources = None,[],None,None
+    try:
+        try:
+            proc = subprocess.Popen(__limited(args["cmd"]), cwd=os.path.join(scratch, "src"), env=env,
+                stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                start_new_session=True)
+        except OSError as e:
+            raise SolScanError(f"Cannot start {task.tool.id}/{task.tool.mode} locally\n{e}")
+        limit = src.resources.mem_bytes(task.settings.log_limit)
+        chunks = iter(lambda: proc.stdout.read1(65536), b"")
+        collector = threading.Thread(target=src.io.write_chunks, args=(fn_log, chunks, limit), daemon=True)
+        collector.start()
+
+        # wait4 provides the resource usage of the process
+        waited = []
+        waiter = threading.Thread(target=lambda: waited.append(os.wait4(proc.pid, 0)), daemon=True)
+        waiter.start()
+        timed_out, oom_killed, rss_peak = __wait(waiter, proc.pid, src.tasks.timeout(tasks), src.resources.mem_bytes(args.get("mem_limit")))
+        # kill the tool when out of time or memory, or the processes left behind by it
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            # the process group has terminated meanwhile
+            pass
+        waiter.join()
+        if not timed_out:
+            _, status, rusage = waited[0]
+            exit_code = __exit_code(status)
+            resources = __resources(rusage, args, rss_peak)
+            resources["oom_killed"] = oom_killed
+            resources["mem_limit_reached"] |= oom_killed
+        proc.returncode = exit_code if exit_code is not None else -signal.SIGKILL
+        collector.join()
+        proc.stdout.close()
+
+        if os.path.exists(fn_log) and os.path.getsize(fn_log) == 0:
+            os.remove(fn_log)
+        logs = src.io.read_log(fn_log)
+        if task.tool.output:
+            output = __output(task, root)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return exit_code, logs, output, __task_args(args, scratch), resources
+
+async def execute_batch_async(tasks):
+    """Coroutine version of execute_batch."""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, execute_batch, tasks)
@@ -1,6 +1,8 @@
 import os
 import importlib.util
 import src.cfg
+import src.io
+import src.sarif
 from src.exceptions import SolScanError
 
 tool_parsers = {}
@@ -52,3 +54,50 @@ def parse(task_log, tool_log, tool_output):
             "version": tool_parser.VERSION
         }
     }
+
+
+def merge(parsed_results):
+    """Merge the parsed results of the contracts in a file into a single result.
+
+    parsed_results maps the names of the contracts to their results. Findings
+    are tagged with their contract, infos, errors and fails are united.
+    """
+    findings, infos, errors, fails = [], set(), set(), set()
+    parser = None
+    for contract, result in sorted(parsed_results.items()):
+        for finding in result["findings"]:
+            finding.setdefault("contract", contract)
+            findings.append(finding)
+        for merged, key in ((infos, "infos"), (errors, "errors"), (fails, "fails")):
+            merged.update(result[key])
+        parser = parser or result["parser"]
+    return {
+        "findings": findings,
+        "infos": sorted(infos),
+        "errors": sorted(errors),
+        "fails": sorted(fails),
+        "parser": parser,
+        "contracts": sorted(parsed_results),
+    }
+
+
+def merge_contracts(rdir, contracts, sarif):
+    """Merge the parsed results of the contracts, in subfolders of rdir, into rdir."""
+    parsed_results, task_log, missing = {}, None, []
+    for contract in contracts:
+        fn_parser_output = os.path.join(rdir, contract, src.cfg.PARSER_OUTPUT)
+        if not os.path.exists(fn_parser_output):
+            missing.append(contract)
+            continue
+        parsed_results[contract] = src.io.read_json(fn_parser_output)
+        task_log = task_log or src.io.read_json(os.path.join(rdir, contract, src.cfg.TASK_LOG))
+    if not parsed_results:
+        return
+    merged_result = merge(parsed_results)
+    if missing:
+        merged_result["fails"] = sorted(set(merged_result["fails"]) | {f"no result for contract {c}" for c in missing})
+    src.io.write_json(os.path.join(rdir, src.cfg.PARSER_OUTPUT), merged_result)
+
+    if sarif:
+        sarif_result = src.sarif.sarify(task_log["tool"], merged_result["findings"])
+        src.io.write_json(os.path.join(rdir, src.cfg.SARIF_OUTPUT), sarif_result)
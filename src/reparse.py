@@ -37,7 +37,7 @@ def reparser(taskqueue, sarif, verbose):
         if verbose:
             print(d)
         srcj = src.io.read_json(fn_srcj)
-        log = src.io.read_lines(fn_log) if os.path.exists(fn_log) else []
+        log = src.io.read_log(fn_log)
         tar = src.io.read_bin(fn_tar) if os.path.exists(fn_tar) else None
         parsed_result = src.parsing.parse(srcj, log, tar)
         src.io.write_json(fn_json, parsed_result)
@@ -93,6 +93,21 @@ def main():
     for r in reparsers:
         r.join()
 
+    # merge the results of files analysed contract by contract
+    contracts = {}
+    for r in sorted(results):
+        try:
+            contract = src.io.read_json(os.path.join(r, src.cfg.TASK_LOG)).get("contract")
+        except Exception:
+            continue
+        if contract:
+            contracts.setdefault(os.path.dirname(r), []).append(contract)
+    for d, names in sorted(contracts.items()):
+        try:
+            src.parsing.merge_contracts(d, names, args.sarif)
+        except Exception as e:
+            print(f"{d}: merging failed, {e}")
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,171 @@
+import os
+from contextlib import contextmanager
+import src.tools
+from src.exceptions import SolScanError
+
+# docker's default cpu period; a cpu_quota of CPU_PERIOD corresponds to one core
+CPU_PERIOD = 100000
+MEM_UNITS = {"k": 1024, "m": 1024**2, "g": 1024**3}
+
+
+def mem_bytes(spec):
+    """Convert a memory specification like 512m or 4g to bytes."""
+    if spec is None:
+        return None
+    spec = str(spec).replace(" ", "").lower()
+    try:
+        if spec[-1] in MEM_UNITS:
+            return int(spec[:-1]) * MEM_UNITS[spec[-1]]
+        return int(spec)
+    except:
+        raise SolScanError(f"'{spec}' is not a valid memory specification")
+
+
+def host_cpus():
+    return os.cpu_count() or 1
+
+
+def host_memory():
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def demand(task):
+    """Cores and bytes of memory a task may use, as declared by its quotas.
+
+    As for the docker arguments, the settings take precedence over the tool.
+    A task without cpu quota is charged one core, and a task without memory
+    limit is not charged any memory.
+    """
+    cpu_quota = task.settings.cpu_quota or task.tool.cpu_quota
+    mem_limit = task.settings.mem_limit or task.tool.mem_limit
+    cpus = cpu_quota / CPU_PERIOD if cpu_quota else 1.0
+    memory = mem_bytes(mem_limit) or 0
+    return cpus, memory
+
+
+def tmpfs_demand(task):
+    """Bytes of memory for the tmpfs mounts of /src and the scratch paths of a task."""
+    if not task.settings.tmpfs or task.settings.pool or not task.tool.tmpfs or task.backend != "docker":
+        return 0
+    return mem_bytes(task.tool.tmpfs) * (1 + len(task.tool.scratch or []))
+
+
+class Admission:
+    """Admission control for containers, shared by all analyser processes.
+
+    Before a container is started, the quotas of its task are reserved from
+    the cores and memory of the host, and released when it has finished.
+    A task is admitted when its demand fits into the remaining resources,
+    or when nothing else is running (such that oversized tasks still run).
+    """
+
+    def __init__(self, mp, cpus, memory, tmpfs=None):
+        self.cpus = cpus
+        self.memory = memory
+        self.condition = mp.Condition()
+        self.cpus_free = mp.Value('d', float(cpus), lock=False)
+        self.memory_free = mp.Value('d', float(memory or 0), lock=False)
+        self.running = mp.Value('L', 0, lock=False)
+        self.tmpfs_free = mp.Value('d', float(tmpfs or 0), lock=False)
+
+    def fits(self, cpus, memory):
+        return (self.running.value == 0 or
+                (cpus <= self.cpus_free.value + 1e-9 and
+                 (not self.memory or memory <= self.memory_free.value)))
+
+    def acquire(self, cpus, memory):
+        with self.condition:
+            while not self.fits(cpus, memory):
+                self.condition.wait()
+            self.cpus_free.value -= cpus
+            self.memory_free.value -= memory
+            self.running.value += 1
+
+    def try_acquire(self, cpus, memory):
+        """Reserve the resources if available, without waiting."""
+        with self.condition:
+            if not self.fits(cpus, memory):
+                return False
+            self.cpus_free.value -= cpus
+            self.memory_free.value -= memory
+            self.running.value += 1
+            return True
+
+    def release(self, cpus, memory):
+        with self.condition:
+            self.cpus_free.value += cpus
+            self.memory_free.value += memory
+            self.running.value -= 1
+            self.condition.notify_all()
+
+    @contextmanager
+    def reserve(self, task):
+        cpus, memory = demand(task)
+        self.acquire(cpus, memory)
+        try:
+            yield
+        finally:
+            self.release(cpus, memory)
+
+    @contextmanager
+    def tmpfs(self, tasks):
+        """Back /src of the tasks by tmpfs, if the memory fits the tmpfs budget.
+
+        Unlike containers, tasks do not wait for tmpfs memory; if the
+        budget is exhausted, their /src stays on disk.
+        """
+        size = tmpfs_demand(tasks[0])
+        with self.condition:
+            reserved = 0 < size <= self.tmpfs_free.value
+            if reserved:
+                self.tmpfs_free.value -= size
+        for task in tasks:
+            task.tmpfs = reserved
+        try:
+            yield
+        finally:
+            if reserved:
+                with self.condition:
+                    self.tmpfs_free.value += size
+
+
+@contextmanager
+def unlimited(task):
+    yield
+
+
+def tool_limits(tools, settings):
+    """Maximal number of parallel tasks per tool id.
+
+    The attribute 'max_parallel' of the tool is overridden by the setting
+    of the same name, which maps tool ids (or aliases) to numbers.
+    """
+    limits = {tool.id: tool.max_parallel for tool in tools if tool.max_parallel}
+    for toolid, n in settings.max_parallel.items():
+        for tool in src.tools.load([toolid], [], set()):
+            limits[tool.id] = n
+    return limits
+
+
+class ToolSlots:
+    """Per-tool limits on concurrent tasks, shared by all analyser processes."""
+
+    def __init__(self, mp, limits):
+        self.semaphores = {toolid: mp.BoundedSemaphore(n) for toolid, n in limits.items()}
+
+    def try_acquire(self, toolid):
+        semaphore = self.semaphores.get(toolid)
+        return semaphore is None or semaphore.acquire(block=False)
+
+    def acquire(self, toolid):
+        semaphore = self.semaphores.get(toolid)
+        if semaphore is not None:
+            semaphore.acquire()
+
+    def release(self, toolid):
+        semaphore = self.semaphores.get(toolid)
+        if semaphore is not None:
+            semaphore.release()
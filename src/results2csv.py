@@ -10,6 +10,10 @@ FIELDS = (
     "filename", "basename", "toolid", "toolmode", "parser_version", "runid",
     "start", "duration", "exit_code", "findings", "infos", "errors", "fails")
 
+# container telemetry, only exported on request
+RESOURCE_FIELDS = (
+    "memory_peak", "cpu_seconds", "block_read", "block_write", "mem_limit_reached", "oom_killed")
+
 
 def main():
     argparser = argparse.ArgumentParser(
@@ -25,16 +29,16 @@ def main():
                            nargs="+",
                            metavar="FIELD",
                            type=str,
-                           choices=FIELDS,
+                           choices=FIELDS + RESOURCE_FIELDS,
                            default=FIELDS,
-                           help=f"fields to include in the csv output; one or more of {', '.join(FIELDS)} (default: all)")
+                           help=f"fields to include in the csv output; one or more of {', '.join(FIELDS + RESOURCE_FIELDS)} (default: {', '.join(FIELDS)})")
     argparser.add_argument("-x",
                            nargs="+",
                            metavar="FIELD",
                            type=str,
-                           choices=FIELDS,
+                           choices=FIELDS + RESOURCE_FIELDS,
                            default=[],
-                           help=f"fields to exclude from csv output; one or more of {', '.join(FIELDS)} (default: none excluded)")
+                           help=f"fields to exclude from csv output; one or more of {', '.join(FIELDS + RESOURCE_FIELDS)} (default: none excluded)")
     argparser.add_argument("results",
                            nargs="+",
                            metavar="DIR",
@@ -109,6 +113,9 @@ def data2csv(task_log, parser_output, postgres, fields):
         "errors": parser_output["errors"],
         "fails": parser_output["fails"],
     }
+    resources = task_log.get("resources") or {}
+    for f in RESOURCE_FIELDS:
+        csv[f] = resources.get(f)
     for f in ("findings", "infos", "errors", "fails"):
         if postgres:
             csv[f] = list2postgres(csv[f])
@@ -0,0 +1,162 @@
+import heapq
+import json
+import os
+import random
+import src.cfg
+import src.io
+from src.exceptions import SolScanError
+
+# assumed duration of a task [s], if neither the tool nor the timeout give a hint
+DEFAULT_DURATION = 60.0
+
+
+# durations of the tasks of previous runs, appended as each task finishes
+DURATIONS = os.path.join(src.cfg.CACHE_HOME, "durations.jsonl")
+
+# number of lines in DURATIONS beyond which it is compacted to one line per task
+MAX_DURATIONS = 10000
+
+
+def record(tasks, duration):
+    """Append the duration of the tasks, which ran as a batch, to DURATIONS.
+
+    The lines are appended with a single write, such that several processes
+    can record concurrently. The history is a mere hint for scheduling, hence
+    failures are ignored.
+    """
+    data = "".join(json.dumps({
+        "tool": task.tool.id,
+        "mode": task.tool.mode,
+        "filename": task.relfn,
+        "contract": task.contract,
+        "duration": duration / len(tasks)}) + "\n" for task in tasks)
+    try:
+        os.makedirs(os.path.dirname(DURATIONS), exist_ok=True)
+        src.io.append_txt(DURATIONS, data)
+    except (OSError, SolScanError):
+        pass
+
+
+def recorded():
+    """Collect the durations recorded in DURATIONS.
+
+    Returns a dict mapping (toolid, toolmode, filename, contract) to the
+    average duration, where contract is None unless the tool analyses one
+    contract per task. If the file has grown beyond MAX_DURATIONS lines, it
+    is replaced by the averages.
+    """
+    durations, lines = {}, 0
+    try:
+        with open(DURATIONS, "r", encoding="utf8") as f:
+            for line in f:
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                    key = (entry["tool"], entry["mode"], entry["filename"], entry["contract"])
+                    duration = float(entry["duration"])
+                except Exception:
+                    continue
+                durations.setdefault(key, []).append(duration)
+    except OSError:
+        return {}
+    averages = {k: sum(v) / len(v) for k, v in durations.items()}
+    if lines > MAX_DURATIONS:
+        data = "".join(json.dumps({
+            "tool": toolid,
+            "mode": toolmode,
+            "filename": filename,
+            "contract": contract,
+            "duration": duration}) + "\n" for (toolid, toolmode, filename, contract), duration in averages.items())
+        try:
+            tmp = f"{DURATIONS}.{os.getpid()}"
+            with open(tmp, "w", encoding="utf8") as f:
+                f.write(data)
+            os.replace(tmp, DURATIONS)
+        except OSError:
+            pass
+    return averages
+
+
+def walk(dirs):
+    """Collect the durations of previous analyses from the task logs below dirs.
+
+    Returns a dict like recorded().
+    """
+    durations = {}
+    for d in dirs:
+        for path, _, files in os.walk(d):
+            if src.cfg.TASK_LOG not in files:
+                continue
+            try:
+                task_log = src.io.read_json(os.path.join(path, src.cfg.TASK_LOG))
+                key = (task_log["tool"]["id"], task_log["tool"]["mode"], task_log["filename"], task_log.get("contract"))
+                duration = float(task_log["result"]["duration"])
+            except Exception:
+                continue
+            durations.setdefault(key, []).append(duration)
+    return {k: sum(v) / len(v) for k, v in durations.items()}
+
+
+def history(settings):
+    """Durations of previous analyses, for estimating the durations of tasks.
+
+    Unless folders with previous results are specified explicitly, these are
+    the durations recorded by previous runs. When resuming, no history is
+    consulted, such that the interrupted run continues without delay.
+    """
+    if settings.resume:
+        return {}
+    if settings.history is None:
+        return recorded()
+    return walk(settings.history)
+
+
+class Estimator:
+    """Estimate the duration of a task from previous runs.
+
+    For unseen combinations of tool and file, we fall back to the average
+    duration of the tool, then to the timeout, and finally to DEFAULT_DURATION.
+    """
+
+    def __init__(self, durations, timeout):
+        self.durations = durations
+        per_tool = {}
+        for (toolid, toolmode, *_), duration in durations.items():
+            per_tool.setdefault((toolid, toolmode), []).append(duration)
+        self.tool_durations = {k: sum(v) / len(v) for k, v in per_tool.items()}
+        self.default = float(timeout) if timeout else DEFAULT_DURATION
+        self.hits = 0
+
+    def __call__(self, task):
+        key = (task.tool.id, task.tool.mode, task.relfn, task.contract)
+        if key in self.durations:
+            self.hits += 1
+            return self.durations[key]
+        return self.tool_durations.get((task.tool.id, task.tool.mode), self.default)
+
+
+def makespan(estimates, processes):
+    """Predict the total duration when the items are processed in the given order."""
+    loads = [0.0] * max(1, processes)
+    for estimate in estimates:
+        heapq.heapreplace(loads, loads[0] + estimate)
+    return max(loads)
+
+
+def schedule(items, settings):
+    """Order the items (tasks or batches of tasks) longest first.
+
+    Returns the ordered items, the predicted makespan and the number of
+    tasks with a known duration.
+    """
+    estimator = Estimator(history(settings), settings.timeout)
+    estimates = []
+    for item in items:
+        batch = item if isinstance(item, list) else [item]
+        estimates.append(sum(estimator(task) for task in batch))
+
+    # shuffle first, such that items with equal estimates are still spread randomly
+    order = list(range(len(items)))
+    random.shuffle(order)
+    order.sort(key=lambda i: estimates[i], reverse=True)
+    return [items[i] for i in order], makespan((estimates[i] for i in order), settings.processes), estimator.hits
@@ -9,6 +9,7 @@ from src.exceptions import SolScanError, InternalError
 HOME = os.path.expanduser("~")  # cross-plattform safe
 NOW = time.gmtime()  # only use in main process, value may be different in sub-processes
 PID = os.getpid()   # only use in main process, value may be different in sub-processes
+EXECUTORS = ("processes", "asyncio")
 
 
 class Settings:
@@ -21,19 +22,40 @@ class Settings:
         self.runid = "${YEAR}${MONTH}${DAY}_${HOUR}${MIN}"
         self.overwrite = False
         self.processes = 1
+        self.executor = "processes"
+        self.parsers = None
+        self.max_parallel = {}
+        self.pool = None
+        self.cpus = None
+        self.memory = None
         self.timeout = None
         self.cpu_quota = None
         self.mem_limit = None
         self.results = os.path.join("results", "${TOOL}", "${RUNID}", "${FILENAME}")
         self.log = os.path.join("results", "logs", "${RUNID}.log")
+        self.journal = os.path.join("results", "logs", "${RUNID}.journal")
+        self.resume = False
+        self.history = None
         self.json = False
         self.sarif = False
         self.quiet = False
+        self.cache = False
+        self.cache_size = None
+        self.log_limit = None
+        self.output_volume = False
+        self.tmpfs = None
+        self.local = []
+        self.stream = False
+        self.offline = False
+        self.solc_mirror = None
 
     def freeze(self):
         if self.frozen:
             return
         self.frozen = True
+        if self.parsers is None:
+            # as many parsers as analysers, like parsing within the analysers
+            self.parsers = self.processes
         env = {
             'SBVERSION': src.cfg.VERSION,
             'SBHOME': src.cfg.HOME,
@@ -58,6 +80,11 @@ class Settings:
         except KeyError as e:
             raise SolScanError(f"Unknown variable '{e}' in name of log file")
 
+        try:
+            self.journal = string.Template(self.journal).substitute(env, RUNID=self.runid)
+        except KeyError as e:
+            raise SolScanError(f"Unknown variable '{e}' in name of journal")
+
         self.results = string.Template(self.results).safe_substitute(env, RUNID=self.runid)
         self.results = string.Template(self.results)
 
@@ -91,10 +118,10 @@ class Settings:
             k = k.replace("-", "_")
 
             # attributes accepting None as a value
-            if k in ("timeout", "cpu_quota", "mem_limit") and v in (None, 0, "0"):
+            if k in ("timeout", "cpu_quota", "mem_limit", "pool", "cpus", "memory", "cache_size", "log_limit", "tmpfs", "parsers") and v in (None, 0, "0"):
                 setattr(self, k, None)
 
-            elif k in ("timeout", "cpu_quota", "processes"):
+            elif k in ("timeout", "cpu_quota", "processes", "pool", "cpus", "parsers"):
                 try:
                     v = int(v)
                     assert v > 0
@@ -102,7 +129,7 @@ class Settings:
                 except:
                     raise SolScanError(f"'{k}' needs to be a positive integer (in {settings}).")
 
-            elif k in ("tools"):
+            elif k in ("tools", "local"):
                 if not isinstance(v, list):
                     v = [v]
                 try:
@@ -110,6 +137,17 @@ class Settings:
                 except:
                     raise SolScanError(f"'{k}' needs to be a string or a list of strings (in {settings}).")
 
+            elif k in ("history"):
+                if v is None:
+                    setattr(self, k, None)
+                    continue
+                if not isinstance(v, list):
+                    v = [v]
+                try:
+                    setattr(self, k, [str(vi).replace("/", os.path.sep) for vi in v])
+                except:
+                    raise SolScanError(f"'{k}' needs to be a path or a list of paths (in {settings}).")
+
             elif k in ("files"):
                 if not isinstance(v, list):
                     v = [v]
@@ -129,26 +167,54 @@ class Settings:
                     root_specs.append((root, spec))
                 setattr(self, k, root_specs)
 
-            elif k in ("runtime", "overwrite", "quiet", "json", "sarif"):
+            elif k in ("runtime", "overwrite", "quiet", "json", "sarif", "resume", "cache", "output_volume", "stream", "offline"):
                 try:
                     assert isinstance(v, bool)
                     setattr(self, k, v)
                 except:
                     raise SolScanError(f"'{k}' needs to be a Boolean (in {settings}).")
 
-            elif k in ("results", "log"):
+            elif k in ("results", "log", "journal"):
                 try:
                     setattr(self, k, str(v).replace("/", os.path.sep))
                 except:
                     raise SolScanError(f"'{k}' needs to be a path (in {settings}).")
 
+            elif k == "max_parallel":
+                # mapping of tools to numbers, or list of strings TOOL=N
+                try:
+                    if isinstance(v, dict):
+                        v = v.items()
+                    else:
+                        if not isinstance(v, list):
+                            v = [v]
+                        v = [str(vi).split("=") for vi in v]
+                    limits = {}
+                    for toolid, n in v:
+                        limits[str(toolid)] = int(n)
+                        assert limits[str(toolid)] > 0
+                    self.max_parallel = dict(self.max_parallel, **limits)
+                except:
+                    raise SolScanError(f"'{k}' needs to map tools to positive integers (in {settings}).")
+
+            elif k in ("executor"):
+                if v not in EXECUTORS:
+                    raise SolScanError(f"'{k}' needs to be one of {', '.join(EXECUTORS)} (in {settings}).")
+                setattr(self, k, v)
+
+            elif k == "solc_mirror":
+                try:
+                    setattr(self, k, str(v) if v else None)
+                except:
+                    raise SolScanError(f"'{k}' needs to be a path or URL (in {settings}).")
+
             elif k in ("runid"):
                 try:
                     setattr(self, k, str(v))
                 except:
                     raise SolScanError(f"'{k}' needs to be a string (in {settings}).")
 
-            elif k == "mem_limit":
+            elif k in ("mem_limit", "memory", "cache_size", "log_limit", "tmpfs"):
                 try:
                     v = str(v).replace(" ", "")
                     if v[-1] in "kKmMgG":
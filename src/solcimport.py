@@ -0,0 +1,39 @@
+import argparse
+import sys
+import solcx
+
+# binaries for Linux in Docker images, as in src.solidity
+solcx.set_target_os("linux")
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        prog="solc-import",
+        description=f"Install solc binaries from tar archives, into {solcx.get_solcx_install_folder()}.")
+    argparser.add_argument("-v",
+                           action='store_true',
+                           help="list the versions installed")
+    argparser.add_argument("archives",
+                           nargs="+",
+                           metavar="ARCHIVE",
+                           help="tar archive with the contents of a solc folder (solc-v*) or of a mirror of solc-bin (with list.json)")
+
+    if len(sys.argv) == 1:
+        argparser.print_help(sys.stderr)
+        sys.exit(1)
+
+    args = argparser.parse_args()
+
+    for archive in args.archives:
+        try:
+            versions = solcx.import_solc_archive(archive)
+        except Exception as e:
+            sys.exit(f"{archive}: {e}")
+        print(f"{archive}: {len(versions)} solc version(s) installed")
+        if args.v:
+            for version in versions:
+                print(f"    {version}")
+
+
+if __name__ == '__main__':
+    main()
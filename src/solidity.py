@@ -1,63 +1,152 @@
 import os
 import re
+import subprocess
+import concurrent.futures
+import hashlib
+import json
+import mmap
+import tempfile
 from pathlib import Path
+import src.cfg
+from src.exceptions import SolScanError
 
 import solcx
 # load binaries for Linux in Docker images, not for host platform
 solcx.set_target_os("linux")
 
 
-VOID_START = re.compile('//|/\*|"|\'')
-PRAGMA = re.compile('pragma solidity.*?;')
-QUOTE_END = re.compile("(?<!\\\\)'")
-DQUOTE_END = re.compile('(?<!\\\\)"')
-
-
-def remove_void(line):
-    while True:
-        m = VOID_START.search(line)
-        if not m:
-            break
-        if m[0] == '//':
-            return (line[:m.start()], False)
-        if m[0] == '/*':
-            end = line.find('*/', m.end())
-            if end == -1:
-                return (line[:m.start()], True)
-            else:
-                line = line[:m.start()] + line[end + 2:]
-                continue
-        if m[0] == '"':
-            m2 = DQUOTE_END.search(line[m.end():])
-        else:  # m[0] == "'":
-            m2 = QUOTE_END.search(line[m.end():])
-        if m2:
-            line = line[:m.start()] + line[m.end() + m2.end():]
-            continue
-        # we should not arrive here for a correct Solidity program
-        return (line[:m.start()], False)
-    return (line, False)
-
-
-def get_pragma(prg):
-    in_comment = False
-    for line in prg:
-        if in_comment:
-            end = line.find('*/')
-            if end == -1:
-                continue
-            else:
-                line = line[end + 2:]
-        line, in_comment = remove_void(line)
-        m = PRAGMA.search(line)
-        if m:
-            return m[0]
+# Comments and string literals, skipped when scanning the source code in a single pass.
+# Unterminated strings end at the line end, unterminated comments at the end of the file.
+VOID = rb'//[^\n]*|/\*.*?(?:\*/|\Z)|"(?:\\.|[^"\\\n])*"?|\'(?:\\.|[^\'\\\n])*\'?'
+PRAGMA = re.compile(VOID + rb'|(pragma solidity[^;\n]*;)', re.S)
+CONTRACT = re.compile(VOID + rb'|\b((?:abstract\s+)?contract|library|interface)\s+([A-Za-z_$][A-Za-z0-9_$]*)', re.S)
+
+# seconds granted to solc for determining the contracts of a file
+SOLC_TIMEOUT = 120
+
+
+def scan_pragma(data):
+    """Return the first pragma of the source code, given as bytes or mmap.
+
+    The scan stops at the pragma, usually found near the top of the file.
+    """
+    for m in PRAGMA.finditer(data):
+        if m[1]:
+            return m[1].decode("utf8", errors="replace")
     return None
 
 
+def read_source(fn):
+    """Return the contents of the file as mmap, or bytes if it is empty."""
+    try:
+        with open(fn, "rb") as f:
+            try:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # cannot map empty files
+                return b""
+    except OSError as e:
+        raise SolScanError(e)
+
+
+# pragmas of the contracts seen before, keyed by the hash of their contents
+PRAGMA_CACHE = os.path.join(src.cfg.CACHE_HOME, "pragmas.json")
+cached_pragmas = None
+cached_pragmas_changed = False
+
+
+def read_pragma(fn):
+    """Return the pragma of the file, from the pragma cache if possible."""
+    global cached_pragmas, cached_pragmas_changed
+    if cached_pragmas is None:
+        try:
+            with open(PRAGMA_CACHE, "r", encoding="utf8") as f:
+                cached_pragmas = json.load(f)
+        except (OSError, ValueError):
+            cached_pragmas = {}
+    data = read_source(fn)
+    try:
+        k = hashlib.sha256(data).hexdigest()
+        if k not in cached_pragmas:
+            cached_pragmas[k] = scan_pragma(data)
+            cached_pragmas_changed = True
+        return cached_pragmas[k]
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+
+def save_pragmas():
+    """Write the pragma cache back to disk, if new pragmas were added."""
+    global cached_pragmas_changed
+    if not cached_pragmas_changed:
+        return
+    os.makedirs(os.path.dirname(PRAGMA_CACHE), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(PRAGMA_CACHE))
+    try:
+        with os.fdopen(fd, "w", encoding="utf8") as f:
+            json.dump(cached_pragmas, f)
+        os.replace(tmp, PRAGMA_CACHE)
+    except OSError:
+        # the cache is an optimisation, do not fail the run
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return
+    cached_pragmas_changed = False
+
+
+def get_contracts(data):
+    """Map the names of the contracts, libraries and interfaces defined in the source code to their kind."""
+    contracts = {}
+    for m in CONTRACT.finditer(data):
+        if m[1]:
+            kind = re.sub(r"\s+", " ", m[1].decode("utf8"))
+            contracts[m[2].decode("utf8")] = kind
+    return contracts
+
+
+def deployed_contracts(fn, solc_path):
+    """Names of the contracts in the file with deployed bytecode, as compiled by solc.
+
+    Abstract contracts and interfaces have no bytecode, whatever their
+    syntax. Returns None if the file cannot be compiled on the host, e.g.
+    because the solc binary is for another platform.
+    """
+    fn = os.path.abspath(fn)
+    input_json = json.dumps({
+        "language": "Solidity",
+        "sources": {fn: {"urls": [fn]}},
+        "settings": {
+            "optimizer": {"enabled": False},
+            "outputSelection": {"*": {"*": ["evm.deployedBytecode.object"]}}}})
+    try:
+        p = subprocess.run([solc_path, "--standard-json", "--allow-paths", f".,/,{os.path.dirname(fn)}"],
+            input=input_json.encode("utf8"), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=SOLC_TIMEOUT)
+        result = json.loads(p.stdout)
+    except Exception:
+        return None
+    if any(error.get("severity") == "error" for error in result.get("errors", [])):
+        return None
+    contracts = result.get("contracts", {}).get(fn, {})
+    return [name for name, contract in contracts.items()
+            if contract.get("evm", {}).get("deployedBytecode", {}).get("object")]
+
+
 cached_solc_versions = None
 
 
+def set_offline(offline):
+    """Select solc versions from the cached release list, and do not download any."""
+    solcx.set_offline(True if offline else None)
+
+
+def set_mirror(mirror):
+    """Load the release list and the solc binaries from a mirror."""
+    solcx.set_mirror(mirror)
+
+
 def ensure_solc_versions_loaded():
     global cached_solc_versions
     if cached_solc_versions:
@@ -81,15 +170,40 @@ def get_solc_version(pragma):
 cached_solc_paths = {}
 
 
+def install_solc(version):
+    solcx.install_solc(version)
+    return solcx.get_executable(version)
+
+
 def get_solc_path(version):
     if not version:
         return None
+    version = str(version)
     if version in cached_solc_paths:
         return cached_solc_paths[version]
     try:
-        solcx.install_solc(version)
-        solc_path = solcx.get_executable(version)
+        solc_path = install_solc(version)
     except:
         solc_path = None
     cached_solc_paths[version] = solc_path
     return solc_path
+
+
+def install_solc_versions(versions, workers=4):
+    """Install the solc versions not installed yet, downloading them in parallel.
+
+    Returns a dict mapping the versions that could not be installed to the
+    reason. The paths of the others are available via get_solc_path.
+    """
+    missing = sorted({str(v) for v in versions if v} - set(cached_solc_paths))
+    failures = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        installs = {executor.submit(install_solc, version): version for version in missing}
+        for install in concurrent.futures.as_completed(installs):
+            version = installs[install]
+            try:
+                cached_solc_paths[version] = install.result()
+            except Exception as e:
+                cached_solc_paths[version] = None
+                failures[version] = str(e) or e.__class__.__name__
+    return failures
@@ -11,12 +11,22 @@ import src.logging
 import src.cfg
 import src.io
 import src.settings
+import src.index
 from src.exceptions import SolScanError
 
 
 def collect_files(patterns):
+    """Return the selected files as triples (absfn, relfn, entry).
+
+    The entry is the description of the file from a manifest, or None if the
+    file was not specified by a manifest. Files listed in a manifest are not
+    checked against the filesystem.
+    """
     files = []
     for root, spec in patterns:
+        if src.index.is_manifest(spec):
+            files.extend(src.index.read_manifest(os.path.join(root, spec) if root else spec))
+            continue
         if spec.endswith(".txt"):
             # No globbing, spec is a file specifying a 'dataset'
             contracts = src.io.read_lines(spec)
@@ -33,12 +43,18 @@ def collect_files(patterns):
             root_relfn = os.path.join(root, relfn) if root else relfn
             absfn = os.path.normpath(os.path.abspath(root_relfn))
             if os.path.isfile(absfn) and absfn[-4:] in (".hex", ".sol"):
-                files.append((absfn, relfn))
+                files.append((absfn, relfn, None))
     return files
 
 
-def collect_tasks(files, tools, settings):
+def generate_tasks(files, tools, settings):
+    """Generate the tasks for the files and tools, one by one.
+
+    Files and tools are processed in sorted order, such that the result
+    directories are disambiguated in the same way for every run.
+    """
     used_rdirs = set()
+    local = src.tools.ids(settings.local)
     rdir_collisions = 0
 
     def disambiguate(base):
@@ -63,33 +79,80 @@ def collect_tasks(files, tools, settings):
                     "    Consider using more of $TOOL, $MODE, $ABSDIR, $RELDIR, $FILENAME,\n"
                     "    $FILEBASE, $FILEEXT when specifying the 'results' directory."))
 
-    def get_solc(pragma, fn, toolid):
-        if not src.solidity.ensure_solc_versions_loaded():
-            src.logging.message(src.colors.warning(
-                "Failed to load list of solc versions; are we connected to the internet?\n"
-                "    Proceeding with locally installed versions."),
-                "")
-        solc_version = src.solidity.get_solc_version(pragma)
-        if not solc_version:
-            raise SolScanError(
-                "Cannot determine Solidity version\n"
-                f"{fn}: {pragma}")
-        solc_path = src.solidity.get_solc_path(solc_version)
-        if not solc_path:
-            raise SolScanError(
-                f"Cannot load solc {solc_version}\n"
-                f"required by {toolid} and {fn})")
-        return solc_version, solc_path
-
-    def ensure_loaded(image):
-        if not src.docker.is_loaded(image):
-            src.logging.message(f"Loading docker image {image}, may take a while ...")
-            src.docker.load(image)
-
-    tasks = []
+    versions_loaded = None
 
+    def solc_version_of(absfn, entry):
+        """Determine the solc version for the Solidity file, or None."""
+        nonlocal versions_loaded
+        if entry:
+            # pragma and solc version determined by 'index'
+            pragma, solc_version = entry.get("pragma"), entry.get("solc")
+        else:
+            pragma, solc_version = src.solidity.read_pragma(absfn), None
+        if not solc_version:
+            if versions_loaded is None:
+                versions_loaded = src.solidity.ensure_solc_versions_loaded()
+                if not versions_loaded:
+                    src.logging.message(src.colors.warning(
+                        "Failed to load list of solc versions; are we connected to the internet?\n"
+                        "    Proceeding with locally installed versions."),
+                        "")
+            solc_version = src.solidity.get_solc_version(pragma)
+        return (str(solc_version) if solc_version else None), pragma
+
+    def resolve_solc():
+        """Determine the solc version for each Solidity file, and install the versions.
+
+        Returns a dict mapping the files to their solc version. Missing
+        versions are downloaded in parallel, and all files without a usable
+        version are reported together.
+        """
+        solc_versions = {}
+        if not any(tool.solc and tool.mode == "solidity" for tool in tools):
+            return solc_versions
+        failures = []
+        for absfn, _, entry in files:
+            if absfn[-4:] != ".sol" or absfn in solc_versions:
+                continue
+            solc_version, pragma = solc_version_of(absfn, entry)
+            if not solc_version:
+                failures.append(f"Cannot determine Solidity version\n{absfn}: {pragma}")
+            solc_versions[absfn] = solc_version
+        src.solidity.save_pragmas()
+
+        versions = set(solc_versions.values()) - {None}
+        missing = len(versions - set(src.solidity.cached_solc_paths))
+        if missing:
+            src.logging.message(f"Loading {missing} solc version(s) ...", "")
+        install_failures = src.solidity.install_solc_versions(versions)
+        for version, reason in sorted(install_failures.items()):
+            fns = sorted(fn for fn, v in solc_versions.items() if v == version)
+            failures.append(f"Cannot load solc {version}, required by {len(fns)} file(s) like {fns[0]}\n{reason}")
+        if failures:
+            raise SolScanError("\n".join(failures))
+        return solc_versions
+
+    def stream_solc(absfn, entry):
+        """Determine and install the solc version for a single file.
+
+        When streaming, the files are resolved one by one, such that the
+        tasks of the first files run while the versions of later files are
+        still to be loaded, and each file waits only for its own version.
+        """
+        solc_version, pragma = solc_version_of(absfn, entry)
+        if not solc_version:
+            raise SolScanError(f"Cannot determine Solidity version\n{absfn}: {pragma}")
+        if solc_version not in src.solidity.cached_solc_paths:
+            src.logging.message(f"Loading solc {solc_version} ...", "")
+            failure = src.solidity.install_solc_versions([solc_version]).get(solc_version)
+            if failure:
+                raise SolScanError(f"Cannot load solc {solc_version}, required by {absfn}\n{failure}")
+        return solc_version
+
+    # with a stream of tasks, solc versions are resolved lazily per file
+    solc_versions = {} if settings.stream else resolve_solc()
     last_absfn = None
-    for absfn, relfn in sorted(files):
+    for absfn, relfn, entry in sorted(files, key=operator.itemgetter(0, 1)):
         if absfn == last_absfn:
             # ignore duplicate contracts
             continue
@@ -99,10 +162,8 @@ def collect_tasks(files, tools, settings):
         is_byc = absfn[-4:] == ".hex" and not (absfn[-7:-4] == ".rt" or settings.runtime)
         is_rtc = absfn[-4:] == ".hex" and (absfn[-7:-4] == ".rt" or settings.runtime)
 
-        pragma = None
-        if is_sol:
-            prg = src.io.read_lines(absfn)
-            pragma = src.solidity.get_pragma(prg)
+        # contracts with bytecode, compiled once per file on demand
+        deployed = None
 
         for tool in sorted(tools, key=operator.attrgetter("id", "mode")):
             if ((is_sol and tool.mode == "solidity") or
@@ -115,17 +176,46 @@ def collect_tasks(files, tools, settings):
                 base = settings.resultdir(tool.id, tool.mode, absfn, relfn)
                 rdir = disambiguate(base)
 
-                # load resources
+                # resources, resolved and loaded beforehand unless streaming
                 solc_version, solc_path = None, None
                 if tool.solc:
-                    solc_version, solc_path = get_solc(pragma, absfn, tool.id)
-                ensure_loaded(tool.image)
+                    if settings.stream and absfn not in solc_versions:
+                        solc_versions[absfn] = stream_solc(absfn, entry)
+                    solc_version = solc_versions.get(absfn)
+                    solc_path = src.solidity.get_solc_path(solc_version)
+                    if not solc_path:
+                        raise SolScanError(f"Cannot determine Solidity version\n{absfn}")
+
+                # tools analysing one contract at a time get a task per contract,
+                # with the results in subfolders of the result dir of the file;
+                # if the file cannot be compiled here, the tool gets the whole file
+                names = []
+                if tool.per_contract and is_sol and solc_path:
+                    if deployed is None:
+                        deployed = src.solidity.deployed_contracts(absfn, solc_path) or []
+                    names = deployed
+                for contract in names or [None]:
+                    task_rdir = os.path.join(rdir, contract) if contract else rdir
+                    task = src.tasks.Task(absfn, relfn, task_rdir, solc_version, solc_path, tool, settings)
+                    task.contract = contract
+                    if tool.id in local:
+                        task.backend = "local"
+                    yield task
+
+    if settings.stream:
+        src.solidity.save_pragmas()
+    report_collisions()
 
-                task = src.tasks.Task(absfn, relfn, rdir, solc_version, solc_path, tool, settings)
-                tasks.append(task)
 
-    report_collisions()
-    return tasks
+def collect_tasks(files, tools, settings):
+    return list(generate_tasks(files, tools, settings))
+
+
+def preflight(images):
+    """Make sure the docker images are available, and record their ids."""
+    images = src.docker.preflight(images)
+    for image, image_id in sorted(images.items()):
+        src.logging.message(None, f"Docker image {image}: {image_id}")
 
 
 def main(settings: src.settings.Settings):
@@ -137,10 +227,19 @@ def main(settings: src.settings.Settings):
     tools = src.tools.load(settings.tools)
     if not tools:
         src.logging.message(src.colors.warning("Warning: no tools selected!"))
+    src.solidity.set_offline(settings.offline)
+    src.solidity.set_mirror(settings.solc_mirror)
     files = collect_files(settings.files)
     if not files:
         src.logging.message(src.colors.warning("Warning: no files selected!"))
-    tasks = collect_tasks(files, tools, settings)
-    if not tasks:
-        raise SolScanError("No tasks to execute.")
-    src.analysis.run(tasks, settings)
+    if settings.stream:
+        # start the analysis while the tasks are being generated
+        local = src.tools.ids(settings.local)
+        preflight({tool.image for tool in tools if tool.id not in local})
+        tasks = generate_tasks(files, tools, settings)
+    else:
+        tasks = collect_tasks(files, tools, settings)
+        if not tasks:
+            raise SolScanError("No tasks to execute.")
+        preflight({task.tool.image for task in tasks if task.backend == "docker"})
+    src.analysis.run(tasks, settings, tools)
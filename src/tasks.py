@@ -1,3 +1,6 @@
+import src.io
+
+
 class Task:
     def __init__(self, absfn, relfn, rdir, solc_version, solc_path, tool, settings):
         self.absfn = absfn  # absolute normalized path
@@ -7,7 +10,42 @@ class Task:
         self.solc_path = solc_path
         self.tool = tool
         self.settings = settings
+        self.rerun = False  # overwrite old results, even without settings.overwrite
+        self.cache_key = None
+        self.tmpfs = False  # /src backed by tmpfs
+        self.backend = "docker"  # key of src.analysis.BACKENDS
+        self.contract = None  # name of the contract, for tools analysing one contract per task
 
     def __str__(self):
         s = [f"{k}: {str(v)}" for k, v in self.__dict__.items()]
         return f"{{{', '.join(s)}}}"
+
+
+def timeout(tasks):
+    """Time granted to a batch of tasks: the sum of the time of the individual tasks."""
+    timeout = tasks[0].settings.timeout
+    return timeout * len(tasks) if timeout else timeout
+
+
+def hex_code(task):
+    """The bytecode of the task, sanitised for the tools: first line, without 0x."""
+    code = src.io.read_lines(task.absfn)[0].strip()
+    return code[2:] if code.startswith("0x") else code
+
+
+# Tasks are sent to the analyser processes as compact records, which refer
+# to their tool by an index into a table of tools. The tools and the
+# settings are sent to each process only once.
+
+def pack(task, tool_index):
+    solc_version = str(task.solc_version) if task.solc_version else None
+    return (tool_index, task.absfn, task.relfn, task.rdir, solc_version, task.solc_path, task.backend, task.rerun, task.contract)
+
+
+def unpack(record, tools, settings):
+    tool_index, absfn, relfn, rdir, solc_version, solc_path, backend, rerun, contract = record
+    task = Task(absfn, relfn, rdir, solc_version, solc_path, tools[tool_index], settings)
+    task.backend = backend
+    task.rerun = rerun
+    task.contract = contract
+    return task
@@ -6,7 +6,7 @@ from src.exceptions import SolScanError, InternalError
 
 
 FIELDS = ("id", "mode", "image", "name", "origin", "version", "info", "parser",
-          "output", "bin", "solc", "cpu_quota", "mem_limit", "command", "entrypoint")
+          "output", "bin", "solc", "per_contract", "cpu_quota", "mem_limit", "batch", "max_parallel", "tmpfs", "scratch", "command", "entrypoint")
 
 
 class Tool():
@@ -15,18 +15,24 @@ class Tool():
         for k in FIELDS:
             v = cfg.get(k)
             if v is not None:
-                if k in ("solc"):
+                if k in ("solc", "per_contract"):
                     try:
                         v = bool(v)
                     except:
                         raise SolScanError(f"Tool: value of attribute '{k}' is not a Boolean.\n{cfg}")
-                elif k in ("cpu_quota"):
+                elif k in ("cpu_quota", "batch", "max_parallel"):
                     try:
                         v = int(v)
                         assert v >= 0
                     except:
                         raise SolScanError(f"Tool: value of attribute '{k}' is not an integer>=0.\n{cfg}")
-                elif k in ("mem_limit"):
+                elif k in ("scratch"):
+                    try:
+                        v = [v] if isinstance(v, str) else [str(p) for p in v]
+                        assert all(p.startswith("/") for p in v)
+                    except:
+                        raise SolScanError(f"Tool: value of attribute '{k}' is not an absolute path or a list of them.\n{cfg}")
+                elif k in ("mem_limit", "tmpfs"):
                     try:
                         v = str(v).replace(" ", "")
                         if v[-1] in "kKmMgG":
@@ -60,15 +66,15 @@ class Tool():
         if self.bin:
             self.absrcin = os.path.join(src.cfg.TOOLS_HOME, self.id, self.bin)
 
-    def command(self, filename, timeout, bin):
+    def command(self, filename, timeout, bin, contract=None):
         try:
-            return self._command.substitute(FILENAME=filename, TIMEOUT=timeout, BIN=bin) if self._command else None
+            return self._command.substitute(FILENAME=filename, TIMEOUT=timeout, BIN=bin, CONTRACT=contract or "") if self._command else None
         except KeyError as e:
             raise SolScanError(f"Unknown variable '{e}' in command of tool {self.id}/{self.mode}")
 
-    def entrypoint(self, filename, timeout, bin):
+    def entrypoint(self, filename, timeout, bin, contract=None):
         try:
-            return self._entrypoint.substitute(FILENAME=filename, TIMEOUT=timeout, BIN=bin) if self._entrypoint else None
+            return self._entrypoint.substitute(FILENAME=filename, TIMEOUT=timeout, BIN=bin, CONTRACT=contract or "") if self._entrypoint else None
         except KeyError as e:
             raise SolScanError(f"Unknown variable '{e}' in entrypoint of tool {self.id}/{self.mode}")
 
@@ -154,3 +160,8 @@ def info_finding(tool_id, fname):
         except Exception:
             info_findings[tool_id] = {}
     return info_findings[tool_id].get(fname, {})
+
+
+def ids(names):
+    """Ids of the tools specified by names, which may contain aliases."""
+    return {tool.id for name in names for tool in load([name], [], set())}
@@ -0,0 +1,127 @@
+import glob
+import json
+import os
+import stat
+import pytest
+import src.analysis
+import src.scheduler
+import src.settings
+import src.tasks
+import src.tools
+
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset", "reentrancy")
+DURATION = 1.0
+
+
+def fake_tool(bindir, name, trace):
+    """A tool that records when it starts and ends, and takes DURATION seconds."""
+    fn = os.path.join(bindir, name)
+    with open(fn, "w") as f:
+        f.write("#!/bin/sh\n"
+                f"echo \"{name} start $(date +%s.%N)\" >> '{trace}'\n"
+                f"sleep {DURATION}\n"
+                f"echo \"{name} end $(date +%s.%N)\" >> '{trace}'\n")
+    os.chmod(fn, os.stat(fn).st_mode | stat.S_IEXEC)
+
+
+def read_trace(trace, name=None):
+    """The events of the tool as sorted pairs (time, start)."""
+    with open(trace) as f:
+        events = [line.split() for line in f]
+    return sorted((float(t), kind == "start") for tool, kind, t in events if name in (None, tool))
+
+
+def concurrency(trace, name=None):
+    """Maximal number of overlapping runs, and the span from first start to last end."""
+    events = read_trace(trace, name)
+    running = peak = 0
+    for _, start in events:
+        running += 1 if start else -1
+        peak = max(peak, running)
+    return peak, events[-1][0] - events[0][0], len(events) // 2
+
+
+def make_tasks(tool, settings, n):
+    tasks = []
+    for absfn in sorted(glob.glob(os.path.join(DATASET, "*.sol")))[:n]:
+        relfn = os.path.basename(absfn)
+        task = src.tasks.Task(absfn, relfn, settings.resultdir(tool.id, tool.mode, absfn, relfn), None, None, tool, settings)
+        task.backend = "local"
+        tasks.append(task)
+    return tasks
+
+
+@pytest.mark.parametrize("executor", ["processes", "asyncio"])
+def test_max_parallel_below_processes(tmp_path, monkeypatch, executor):
+    processes, max_parallel, n = 4, 2, 8
+    bindir, trace = tmp_path / "bin", tmp_path / "trace"
+    bindir.mkdir()
+    fake_tool(str(bindir), "solhint", str(trace))
+    monkeypatch.setenv("PATH", f"{bindir}{os.pathsep}{os.environ['PATH']}")
+
+    settings = src.settings.Settings()
+    settings.update({
+        "results": str(tmp_path / "results" / "${TOOL}" / "${FILENAME}"),
+        "log": str(tmp_path / "log"),
+        "journal": str(tmp_path / "journal"),
+        "processes": processes,
+        "executor": executor,
+        "cpus": 8,
+        "max_parallel": {"solhint": max_parallel},
+        "history": [],
+        "local": ["solhint"],
+        "quiet": True})
+    settings.freeze()
+    tool = src.tools.load(["solhint"], [], set())[0]
+    tasks = make_tasks(tool, settings, n)
+
+    src.analysis.run(tasks, settings)
+
+    peak, span, runs = concurrency(str(trace))
+    assert runs == n
+    assert peak == max_parallel
+    # all slots of the tool are kept busy: n/max_parallel rounds, not a serial tail
+    assert span < (n / max_parallel + 1.5) * DURATION
+
+
+@pytest.mark.parametrize("executor", ["processes", "asyncio"])
+def test_limited_tool_keeps_its_slot_busy(tmp_path, monkeypatch, executor):
+    # the long tasks of the limited tool come first, and are not to be
+    # delayed until the tasks of the unlimited tool have run
+    processes, limited, unlimited = 2, 3, 6
+    bindir, trace = tmp_path / "bin", tmp_path / "trace"
+    bindir.mkdir()
+    for name in ("slither", "solhint"):
+        fake_tool(str(bindir), name, str(trace))
+    monkeypatch.setenv("PATH", f"{bindir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("HOME", str(tmp_path))
+    durations = tmp_path / "durations.jsonl"
+    monkeypatch.setattr(src.scheduler, "DURATIONS", str(durations))
+
+    settings = src.settings.Settings()
+    settings.update({
+        "results": str(tmp_path / "results" / "${TOOL}" / "${FILENAME}"),
+        "log": str(tmp_path / "log"),
+        "journal": str(tmp_path / "journal"),
+        "processes": processes,
+        "executor": executor,
+        "cpus": 8,
+        "max_parallel": {"slither": 1},
+        "local": ["slither", "solhint"],
+        "quiet": True})
+    settings.freeze()
+    slither, solhint = (src.tools.load([name], [], set())[0] for name in ("slither", "solhint"))
+    tasks = make_tasks(slither, settings, limited) + make_tasks(solhint, settings, unlimited)
+    with open(durations, "w") as f:
+        for task in tasks:
+            duration = 100 if task.tool.id == "slither" else 1
+            f.write(json.dumps({"tool": task.tool.id, "mode": task.tool.mode, "filename": task.relfn, "contract": None, "duration": duration}) + "\n")
+
+    src.analysis.run(tasks, settings)
+
+    peak, span, runs = concurrency(str(trace), "slither")
+    assert runs == limited
+    assert peak == 1
+    # the runs of slither follow each other without waiting for solhint
+    assert span < (limited + 1) * DURATION
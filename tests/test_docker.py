@@ -0,0 +1,38 @@
+import types
+import pytest
+import src.docker
+
+
+class Container:
+    id = "pooled"
+
+
+def pooled_task(monkeypatch, exit_code):
+    """Execute a task in a pooled container, with the exit code given, and
+    return the container and whether it is back in the pool."""
+    key = ("image", None, None)
+    pooled = src.docker.PooledContainer(key, Container(), "/nonexistent")
+    discarded = []
+    monkeypatch.setattr(src.docker, "_pool", {})
+    monkeypatch.setattr(src.docker, "__docker_args", lambda tasks, srcdir, volumes={}: {"image": "image"})
+    monkeypatch.setattr(src.docker, "__pool_acquire", lambda key, args: pooled)
+    monkeypatch.setattr(src.docker, "__pool_discard", discarded.append)
+    monkeypatch.setattr(src.docker, "__docker_volume", lambda tasks, srcdir=None: None)
+    monkeypatch.setattr(src.docker, "__exec_cmd", lambda args: ["tool"])
+    monkeypatch.setattr(src.docker, "__exec", lambda container, cmd, timeout, task, args: (exit_code, [], None))
+    task = types.SimpleNamespace(
+        tool=types.SimpleNamespace(output=None, timeout=None),
+        settings=types.SimpleNamespace(pool=10, timeout=None))
+    result = src.docker.__execute_pooled([task])
+    assert result[0] == exit_code
+    return pooled in src.docker._pool.get(key, []), discarded == [pooled]
+
+
+@pytest.mark.parametrize("exit_code", [0, 1, 2, 124])
+def test_pooled_container_kept(monkeypatch, exit_code):
+    assert pooled_task(monkeypatch, exit_code) == (True, False)
+
+
+@pytest.mark.parametrize("exit_code", [None, 125, 126, 127, 137])
+def test_pooled_container_recycled(monkeypatch, exit_code):
+    assert pooled_task(monkeypatch, exit_code) == (False, True)
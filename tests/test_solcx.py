@@ -0,0 +1,71 @@
+import random
+import re
+import pytest
+from semantic_version import SimpleSpec, Version
+import solcx.install
+
+
+VERSIONS = [Version(f"0.{minor}.{patch}") for minor, patches in
+            ((1, 7), (2, 2), (3, 6), (4, 26), (5, 17), (6, 12), (7, 6), (8, 19)) for patch in range(patches + 1)]
+
+
+def reference(pragma_string, version_list):
+    """The resolution of pragmas by SimpleSpec, as before the version index."""
+    pragma_string = re.sub(r"(\D)0+(\d)", r"\1\2", pragma_string)
+    comparator_set_range = pragma_string.replace(" ", "").split("||")
+    comparator_regex = re.compile(r"(([<>]?=?|\^)\d+\.\d+\.\d+)")
+    version = None
+    for comparator_set in comparator_set_range:
+        spec = SimpleSpec(",".join((i[0] for i in comparator_regex.findall(comparator_set))))
+        selected = spec.select(version_list)
+        if selected and (not version or version < selected):
+            version = selected
+    return version
+
+
+def select(pragma_string, version_list):
+    """Result or exception type, for comparing both resolutions."""
+    try:
+        return solcx.install._select_pragma_version(pragma_string, version_list)
+    except Exception as e:
+        return type(e)
+
+
+def select_reference(pragma_string, version_list):
+    try:
+        return reference(pragma_string, version_list)
+    except Exception as e:
+        return type(e)
+
+
+def random_pragma(rnd):
+    def comparator():
+        op = rnd.choice(["", "=", ">", ">=", "<", "<=", "^"])
+        version = f"{rnd.randint(0, 1)}.{rnd.randint(0, 9)}.{rnd.randint(0, 30)}"
+        return op + (" " if rnd.random() < 0.2 else "") + version
+    sets = [" ".join(comparator() for _ in range(rnd.randint(1, 3))) for _ in range(rnd.randint(1, 2))]
+    return "pragma solidity " + " || ".join(sets) + ";"
+
+
+@pytest.mark.parametrize("pragma", [
+    "pragma solidity ^0.4.24;",
+    "pragma solidity 0.4.24;",
+    "pragma solidity >=0.4.22 <0.6.0;",
+    "pragma solidity >0.4.23 <=0.5.0;",
+    "pragma solidity ^0.0.1;",
+    "pragma solidity ^0.8.0 || ^0.4.11;",
+    "pragma solidity >=0.5.0 <0.5.0;",
+    "pragma solidity ^0.04.024;",
+    "pragma solidity =0.5.17;",
+    "pragma solidity ^1.0.0;",
+])
+def test_pragma_selection(pragma):
+    assert select(pragma, VERSIONS) == select_reference(pragma, VERSIONS)
+
+
+def test_random_pragmas():
+    rnd = random.Random(20261017)
+    for version_list in (VERSIONS, sorted(VERSIONS, reverse=True), rnd.sample(VERSIONS, 40)):
+        for _ in range(1000):
+            pragma = random_pragma(rnd)
+            assert select(pragma, version_list) == select_reference(pragma, version_list), pragma
@@ -0,0 +1,73 @@
+import os
+import pytest
+import src.solidity
+
+
+@pytest.mark.parametrize("source, pragma", [
+    (b"pragma solidity ^0.4.24;\ncontract C {}", "pragma solidity ^0.4.24;"),
+    # the first of several pragmas
+    (b"pragma solidity >=0.4.22 <0.6.0;\npragma solidity ^0.5.0;\n", "pragma solidity >=0.4.22 <0.6.0;"),
+    (b"pragma experimental ABIEncoderV2;\npragma solidity 0.5.17;\n", "pragma solidity 0.5.17;"),
+    # pragmas in comments and strings do not count
+    (b"// pragma solidity ^0.4.0;\npragma solidity ^0.5.0;", "pragma solidity ^0.5.0;"),
+    (b"/* pragma solidity ^0.4.0;\n*/ pragma solidity ^0.6.0;", "pragma solidity ^0.6.0;"),
+    (b"/** @dev\n * pragma solidity ^0.4.0;\n */\npragma solidity ^0.7.0;", "pragma solidity ^0.7.0;"),
+    (b"contract C { string s = \"pragma solidity ^0.4.0;\"; }\npragma solidity ^0.8.0;", "pragma solidity ^0.8.0;"),
+    (b"contract C { string s = 'pragma solidity ^0.4.0;'; }", None),
+    (b"contract C { string s = \"a \\\" pragma solidity ^0.4.0;\"; }", None),
+    # comment markers within strings, and strings within comments
+    (b"string s = \"//\";\npragma solidity ^0.4.11;", "pragma solidity ^0.4.11;"),
+    (b"// \"\npragma solidity ^0.4.12;", "pragma solidity ^0.4.12;"),
+    # no pragma at all
+    (b"contract C {}", None),
+    (b"", None),
+    (b"/* unterminated comment\npragma solidity ^0.4.0;", None),
+])
+def test_scan_pragma(source, pragma):
+    assert src.solidity.scan_pragma(source) == pragma
+
+
+@pytest.fixture
+def pragma_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(src.solidity, "PRAGMA_CACHE", str(tmp_path / "cache" / "pragmas.json"))
+    monkeypatch.setattr(src.solidity, "cached_pragmas", None)
+    monkeypatch.setattr(src.solidity, "cached_pragmas_changed", False)
+    return tmp_path
+
+
+def test_read_pragma(pragma_cache):
+    fn = pragma_cache / "c.sol"
+    fn.write_bytes(b"pragma solidity ^0.4.24;\ncontract C {}")
+    assert src.solidity.read_pragma(str(fn)) == "pragma solidity ^0.4.24;"
+    empty = pragma_cache / "empty.sol"
+    empty.write_bytes(b"")
+    assert src.solidity.read_pragma(str(empty)) is None
+
+
+def test_pragma_cache_invalidated_by_change(pragma_cache):
+    fn = pragma_cache / "c.sol"
+    fn.write_bytes(b"pragma solidity ^0.4.24;\ncontract C {}")
+    assert src.solidity.read_pragma(str(fn)) == "pragma solidity ^0.4.24;"
+    src.solidity.save_pragmas()
+
+    # a modified file, with a new mtime, is scanned again, also after reloading the cache
+    fn.write_bytes(b"pragma solidity ^0.8.0;\ncontract C {}")
+    stat = os.stat(fn)
+    os.utime(fn, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert src.solidity.read_pragma(str(fn)) == "pragma solidity ^0.8.0;"
+    src.solidity.save_pragmas()
+    src.solidity.cached_pragmas = None
+    assert src.solidity.read_pragma(str(fn)) == "pragma solidity ^0.8.0;"
+
+
+def test_pragma_cache_persists(pragma_cache, monkeypatch):
+    fn = pragma_cache / "c.sol"
+    fn.write_bytes(b"pragma solidity ^0.5.0;")
+    assert src.solidity.read_pragma(str(fn)) == "pragma solidity ^0.5.0;"
+    src.solidity.save_pragmas()
+    assert os.path.exists(src.solidity.PRAGMA_CACHE)
+
+    # after reloading, the pragma comes from the cache, without scanning
+    src.solidity.cached_pragmas = None
+    monkeypatch.setattr(src.solidity, "scan_pragma", lambda data: pytest.fail("scanned again"))
+    assert src.solidity.read_pragma(str(fn)) == "pragma solidity ^0.5.0;"
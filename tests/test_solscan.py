@@ -0,0 +1,13 @@
+import json
+import os
+import src.solscan
+
+
+def test_collect_files_manifest_relative_to_root(tmp_path, monkeypatch):
+    root = tmp_path / "dataset"
+    root.mkdir()
+    manifest = {"version": 1, "files": [{"path": "c.sol", "relfn": "c.sol"}]}
+    (root / "x.json").write_text(json.dumps(manifest))
+    monkeypatch.chdir(tmp_path)
+    files = src.solscan.collect_files([(str(root), "x.json")])
+    assert [(absfn, relfn) for absfn, relfn, _ in files] == [(os.path.join(root, "c.sol"), "c.sol")]
@@ -14,3 +14,6 @@ FINDINGS = {
 
 def parse(exit_code, log, output):
     return gigahorse.parse(exit_code, log, output, FINDINGS)
+
+
+split = gigahorse.split
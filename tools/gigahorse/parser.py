@@ -55,3 +55,31 @@ def parse(exit_code, log, output, FINDINGS):
         fails.add(f"problem extracting results.json from docker container: {e}")
 
     return findings, infos, errors, fails
+
+
+def split(filenames, log, output):
+    """Distribute the output of a batch run to the contracts analysed.
+
+    Gigahorse reports all contracts of the directory in one results.json.
+    Each contract receives the complete log, and an archive containing
+    only its own entries of results.json.
+    """
+    try:
+        with io.BytesIO(output) as o, tarfile.open(fileobj=o) as tar:
+            result = json.loads(tar.extractfile("results.json").read())
+    except Exception:
+        return [(log, output) for _ in filenames]
+
+    outputs = []
+    for filename in filenames:
+        base = filename.rsplit(".", 1)[0]
+        contracts = [contract for contract in result
+                     if contract[0].split("/")[-1] in (filename, base)]
+        results_json = json.dumps(contracts).encode("utf8")
+        with io.BytesIO() as o:
+            with tarfile.open(fileobj=o, mode="w") as tar:
+                info = tarfile.TarInfo("results.json")
+                info.size = len(results_json)
+                tar.addfile(info, io.BytesIO(results_json))
+            outputs.append((log, o.getvalue()))
+    return outputs